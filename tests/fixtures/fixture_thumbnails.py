@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def thumbnail_kvstore(tmp_path_factory):
+    from django.conf import settings
+    path = settings.THUMBNAIL_KVSTORE_PATH
+    settings.THUMBNAIL_KVSTORE_PATH = str(
+        tmp_path_factory.mktemp('thumbnails') / 'thumbnails.sqlite3'
+    )
+    yield
+    settings.THUMBNAIL_KVSTORE_PATH = path
@@ -0,0 +1,199 @@
+import os
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import ProfileDump, SlowQuery
+from .uploads import RejectedUploadsMixin, get_rejected_uploads
+
+
+class ChunkedActionsMixin:
+    """Массовые действия, которые обрабатывают записи пачками.
+
+    Вместо сборки полного графа связанных объектов страница
+    подтверждения показывает только количество затрагиваемых строк,
+    а ход выполнения отдаётся браузеру построчно по мере обработки.
+    """
+
+    bulk_action_template = 'admin/bulk_action.html'
+
+    def bulk_action_confirmation(self, request, action, title, summary,
+                                 form=None):
+        context = {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'summary': summary,
+            'form': form,
+            'action': action,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'opts': self.model._meta,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, self.bulk_action_template, context)
+
+    def bulk_action_progress(self, request, title, steps, total):
+        opts = self.model._meta
+        changelist_url = reverse(
+            f'admin:{opts.app_label}_{opts.model_name}_changelist',
+            current_app=self.admin_site.name
+        )
+
+        def content():
+            yield format_html('<h1>{}</h1><ul>', title)
+            done = 0
+            for processed in steps:
+                done += processed
+                yield format_html('<li>Обработано {} из {}</li>', done, total)
+            yield format_html(
+                '</ul><p>Готово.</p>'
+                '<p><a href="{}">Вернуться к списку</a></p>',
+                changelist_url
+            )
+
+        return StreamingHttpResponse(content())
+
+
+class RejectedUploadsAdminMixin:
+    """Показывает в форме изменения файлы, отброшенные
+    LimitedUploadHandler, вместо молчаливого сохранения без них."""
+
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        rejected = get_rejected_uploads(request)
+        if not rejected:
+            return form
+        return type(form.__name__, (RejectedUploadsMixin, form), {
+            'rejected_uploads': rejected,
+        })
+
+
+class ProfileDumpAdmin(admin.ModelAdmin):
+    list_display = (
+        'created',
+        'method',
+        'path',
+        'status',
+        'trigger',
+        'duration',
+        'sql_count',
+        'sql_time',
+        'template_time',
+        'user',
+    )
+    list_filter = ('trigger', 'status')
+    list_select_related = ('user',)
+    search_fields = ('path',)
+    date_hierarchy = 'created'
+    fields = (
+        'created',
+        'method',
+        'path',
+        'status',
+        'trigger',
+        'user',
+        'duration',
+        'sql_count',
+        'sql_time',
+        'template_time',
+        'download',
+        'summary_text',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_profiledump_download',
+            ),
+        ] + super().get_urls()
+
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse('admin:core_profiledump_download', args=(obj.pk,)),
+            obj.file_name
+        )
+
+    download.short_description = 'Файл профиля'
+
+    def summary_text(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    summary_text.short_description = 'Сводка'
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise Http404
+        dump = get_object_or_404(ProfileDump, pk=pk)
+        try:
+            profile = open(
+                os.path.join(settings.PROFILING_ROOT, dump.file_name), 'rb'
+            )
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(
+            profile, as_attachment=True, filename=dump.file_name
+        )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, ProfileDump.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for file_name in queryset.values_list('file_name', flat=True):
+            try:
+                os.remove(os.path.join(settings.PROFILING_ROOT, file_name))
+            except FileNotFoundError:
+                pass
+        queryset.delete()
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'fingerprint',
+        'sql',
+        'view_name',
+        'source',
+        'count',
+        'total_time',
+        'max_time',
+        'last_seen',
+    )
+    list_filter = ('view_name',)
+    search_fields = ('fingerprint', 'sql', 'source')
+    readonly_fields = (
+        'fingerprint',
+        'sql',
+        'view_name',
+        'source',
+        'count',
+        'total_time',
+        'max_time',
+        'first_seen',
+        'last_seen',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(ProfileDump, ProfileDumpAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -0,0 +1,154 @@
+"""KV-хранилище sorl-thumbnail в файле SQLite на диске узла.
+
+Стандартное хранилище sorl держит сведения о миниатюрах в базе и кеше,
+и на холодном LocMemCache каждая карточка поста превращается в запрос к
+базе. Здесь записи лежат в файле THUMBNAIL_KVSTORE_PATH, который делят
+все процессы узла (журнал WAL позволяет читать во время записи), а
+поверх файла в каждом процессе стоит LRU на THUMBNAIL_KVSTORE_LRU_SIZE
+записей. prefetch загружает в LRU ключи целой страницы одним запросом.
+
+Записи LRU живут THUMBNAIL_KVSTORE_LRU_TIMEOUT секунд, после чего
+читаются из файла заново. Так до процесса доходят и записи, удалённые
+другим процессом: иначе миниатюра, удалённая, например, командой
+thumbnail cleanup, оставалась бы в LRU до вытеснения, и sorl отдавал бы
+ссылку на несуществующий файл. Отсутствие записи тоже запоминается в
+LRU. Если миниатюру тем временем сделал другой процесс, sorl найдёт её
+файл и запишет ключ заново, так что устаревший промах стоит одной
+проверки существования файла.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+MISSING = object()
+# Не больше переменных в одном запросе, чем разрешают старые сборки SQLite.
+QUERY_CHUNK_SIZE = 500
+
+
+class LRUCache:
+    def __init__(self, max_size, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            try:
+                expires, value = self.items[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self.items[key]
+                return default
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+        with self.lock:
+            self.items[key] = expires, value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class SQLiteKVStore(KVStoreBase):
+    def __init__(self):
+        super().__init__()
+        self.local = threading.local()
+        self.lru = LRUCache(
+            settings.THUMBNAIL_KVSTORE_LRU_SIZE,
+            settings.THUMBNAIL_KVSTORE_LRU_TIMEOUT
+        )
+
+    @property
+    def connection(self):
+        """Соединение потока с текущим файлом хранилища."""
+        path = settings.THUMBNAIL_KVSTORE_PATH
+        connections = self.local.__dict__.setdefault('connections', {})
+        if path not in connections:
+            connection = sqlite3.connect(
+                path, timeout=settings.THUMBNAIL_KVSTORE_TIMEOUT,
+                isolation_level=None, check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kvstore '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID'
+            )
+            connections[path] = connection
+        return connections[path]
+
+    def get_many_raw(self, keys):
+        """Значения ключей: из LRU, остальные - одним запросом на пачку."""
+        values = {}
+        missing = []
+        for key in keys:
+            value = self.lru.get(key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                values[key] = value
+        for start in range(0, len(missing), QUERY_CHUNK_SIZE):
+            chunk = missing[start:start + QUERY_CHUNK_SIZE]
+            found = dict(self.connection.execute(
+                'SELECT key, value FROM kvstore WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                chunk
+            ).fetchall())
+            for key in chunk:
+                values[key] = found.get(key)
+                self.lru.set(key, values[key])
+        return values
+
+    def prefetch(self, keys, identity='image'):
+        """Загружает в LRU записи ключей sorl, например миниатюр страницы."""
+        self.get_many_raw([add_prefix(key, identity) for key in keys])
+
+    def clear(self):
+        super().clear()
+        self.lru.clear()
+
+    def _get_raw(self, key):
+        return self.get_many_raw([key])[key]
+
+    def _set_raw(self, key, value):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+            (key, value)
+        )
+        self.lru.set(key, value)
+
+    def _delete_raw(self, *keys):
+        for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[start:start + QUERY_CHUNK_SIZE]
+            self.connection.execute(
+                'DELETE FROM kvstore WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                chunk
+            )
+        for key in keys:
+            self.lru.delete(key)
+
+    def _find_keys_raw(self, prefix):
+        rows = self.connection.execute(
+            'SELECT key FROM kvstore WHERE substr(key, 1, ?) = ?',
+            (len(prefix), prefix)
+        )
+        return [key for key, in rows]
@@ -0,0 +1,167 @@
+"""Сценарии и статистика нагрузочного теста.
+
+Модуль не зависит от настроек Django, чтобы его можно было выполнять
+в отдельных процессах пула.
+"""
+import random
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+ANONYMOUS_SCENARIOS = ('index', 'group', 'profile', 'post')
+SCENARIOS = ANONYMOUS_SCENARIOS + ('follow', 'create', 'comment')
+DEFAULT_MIX = (
+    'index=40,group=15,profile=15,post=10,follow=10,create=5,comment=5'
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(mix):
+    """Разбирает строку вида 'index=40,follow=10' в словарь весов."""
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f'Неизвестный сценарий: {name}')
+        if int(weight or 1) > 0:
+            weights[name] = int(weight or 1)
+    return weights
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку методом ближайшего ранга."""
+    if not values:
+        return 0
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Worker:
+    """Один виртуальный пользователь, который отправляет запросы по смеси.
+
+    Анонимные сценарии идут без cookies, остальные - от имени
+    пользователя, под которым рабочий входит перед началом теста.
+    """
+
+    def __init__(self, base_url, targets, credentials):
+        self.base_url = base_url.rstrip('/')
+        self.targets = targets
+        self.credentials = credentials
+        self.anonymous = requests.Session()
+        self.session = requests.Session()
+        self.logged_in = False
+
+    def url(self, path):
+        return self.base_url + path
+
+    def csrf_post(self, path, data):
+        self.session.get(self.url(path), allow_redirects=False)
+        data['csrfmiddlewaretoken'] = self.session.cookies.get(
+            'csrftoken', ''
+        )
+        return self.session.post(
+            self.url(path), data=data, allow_redirects=False
+        )
+
+    def login(self):
+        if self.logged_in or self.credentials is None:
+            return
+        username, password = self.credentials
+        self.csrf_post(
+            '/auth/login/', {'username': username, 'password': password}
+        )
+        self.logged_in = 'sessionid' in self.session.cookies
+
+    def request(self, scenario):
+        targets = self.targets
+        if scenario == 'index':
+            return self.anonymous.get(self.url('/'))
+        if scenario == 'group':
+            slug = random.choice(targets['groups'])
+            return self.anonymous.get(self.url(f'/group/{slug}/'))
+        if scenario == 'profile':
+            username = random.choice(targets['users'])
+            return self.anonymous.get(self.url(f'/profile/{username}/'))
+        if scenario == 'post':
+            post_id = random.choice(targets['posts'])
+            return self.anonymous.get(self.url(f'/posts/{post_id}/'))
+        self.login()
+        if scenario == 'follow':
+            return self.session.get(
+                self.url('/follow/'), allow_redirects=False
+            )
+        if scenario == 'create':
+            return self.csrf_post(
+                '/create/', {'text': f'Нагрузочный пост {time.time()}'}
+            )
+        if scenario == 'comment':
+            post_id = random.choice(targets['posts'])
+            return self.csrf_post(
+                f'/posts/{post_id}/comment/', {'text': 'Нагрузочный коммент'}
+            )
+        raise ValueError(f'Неизвестный сценарий {scenario}')
+
+    def available(self, scenario):
+        needs = {'group': 'groups', 'profile': 'users', 'post': 'posts',
+                 'comment': 'posts'}
+        if scenario in needs and not self.targets[needs[scenario]]:
+            return False
+        return (
+            scenario in ANONYMOUS_SCENARIOS or self.credentials is not None
+        )
+
+
+def run_worker(base_url, targets, credentials, weights, deadline,
+               max_requests):
+    """Гоняет запросы до deadline и возвращает список результатов.
+
+    Каждый результат - кортеж (сценарий, статус, задержка в секундах,
+    текст ошибки соединения или пустая строка).
+    """
+    worker = Worker(base_url, targets, credentials)
+    weights = {
+        name: weight for name, weight in weights.items()
+        if worker.available(name)
+    }
+    scenarios = list(weights)
+    results = []
+    while scenarios and time.time() < deadline and len(results) < max_requests:
+        scenario = random.choices(scenarios, list(weights.values()))[0]
+        start = time.perf_counter()
+        try:
+            response = worker.request(scenario)
+            status, error = response.status_code, ''
+        except requests.RequestException as exc:
+            status, error = 0, type(exc).__name__
+        results.append((scenario, status, time.perf_counter() - start, error))
+    return results
+
+
+def summarize(results, elapsed):
+    """Сводка: пропускная способность, перцентили и доля ошибок."""
+    by_scenario = defaultdict(list)
+    errors = Counter()
+    for scenario, status, latency, error in results:
+        by_scenario[scenario].append(latency)
+        if error or status >= 400:
+            errors[scenario] += 1
+    rows = []
+    for scenario, latencies in sorted(by_scenario.items()):
+        latencies.sort()
+        rows.append({
+            'scenario': scenario,
+            'requests': len(latencies),
+            'errors': errors[scenario],
+            **{
+                f'p{percent}': percentile(latencies, percent) * 1000
+                for percent in PERCENTILES
+            },
+        })
+    return {
+        'requests': len(results),
+        'errors': sum(errors.values()),
+        'throughput': len(results) / elapsed if elapsed else 0,
+        'rows': rows,
+    }
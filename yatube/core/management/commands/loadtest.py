@@ -0,0 +1,187 @@
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler)
+from django.core.signals import got_request_exception
+from django.db import OperationalError
+
+from core.loadtest import DEFAULT_MIX, parse_mix, run_worker, summarize
+from posts.models import Group, Post
+from users.utils import purge_account
+
+User = get_user_model()
+
+TARGETS_LIMIT = 100
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LockCounter:
+    """Считает ошибки 'database is locked' внутри встроенного сервера."""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, sender, request=None, **kwargs):
+        exc = sys.exc_info()[1]
+        if isinstance(exc, OperationalError) and 'locked' in str(exc):
+            with self.lock:
+                self.count += 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: смесь чтений и записей из пула потоков '
+        'или процессов против локального сервера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Адрес уже запущенного сервера; по умолчанию '
+                 'yatube.wsgi.application запускается в этом процессе'
+        )
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Веса сценариев, например index=40,create=5')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Сколько рабочих отправляют запросы')
+        parser.add_argument('--mode', choices=('thread', 'process'),
+                            default='thread', help='Пул потоков или процессов')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Длительность теста в секундах')
+        parser.add_argument('--max-requests', type=int, default=10 ** 9,
+                            help='Предел запросов на одного рабочего')
+        parser.add_argument(
+            '--users', type=int, default=None,
+            help='Сколько пользователей loadtest_N создать для сценариев '
+                 'с входом; по умолчанию по одному на рабочего. Они '
+                 'получают случайный пароль и удаляются после теста'
+        )
+
+    def get_credentials(self, number):
+        """Пользователи loadtest_N со случайным паролем на этот запуск."""
+        password = secrets.token_urlsafe()
+        credentials = []
+        for i in range(number):
+            username = f'loadtest_{i}'
+            user, _ = User.objects.get_or_create(username=username)
+            user.set_password(password)
+            user.save()
+            credentials.append((username, password))
+        return credentials
+
+    def delete_users(self, credentials):
+        """Удаляет пользователей теста вместе с тем, что они создали."""
+        for user in User.objects.filter(
+            username__in=[username for username, _ in credentials]
+        ):
+            for _ in purge_account(user, settings.BULK_CHUNK_SIZE):
+                pass
+
+    def get_targets(self):
+        return {
+            'groups': list(Group.objects.values_list(
+                'slug', flat=True
+            )[:TARGETS_LIMIT]),
+            'users': list(User.objects.filter(
+                posts__isnull=False
+            ).distinct().values_list('username', flat=True)[:TARGETS_LIMIT]),
+            'posts': list(Post.objects.values_list(
+                'pk', flat=True
+            )[:TARGETS_LIMIT]),
+        }
+
+    def start_server(self):
+        from yatube.wsgi import application
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        server.set_app(application)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address
+        return server, f'http://{host}:{port}'
+
+    def handle(self, *args, **options):
+        try:
+            weights = parse_mix(options['mix'])
+        except ValueError:
+            raise CommandError('Неверный формат --mix')
+        concurrency = options['concurrency']
+        credentials = self.get_credentials(options['users'] or concurrency)
+        targets = self.get_targets()
+        server = None
+        lock_counter = LockCounter()
+        base_url = options['url']
+        if base_url is None:
+            server, base_url = self.start_server()
+            got_request_exception.connect(lock_counter)
+        if options['mode'] == 'process':
+            executor = ProcessPoolExecutor(
+                concurrency, mp_context=get_context('spawn')
+            )
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+        start = time.time()
+        deadline = start + options['duration']
+        try:
+            with executor:
+                futures = [
+                    executor.submit(
+                        run_worker,
+                        base_url,
+                        targets,
+                        credentials[i % len(credentials)]
+                        if credentials else None,
+                        weights,
+                        deadline,
+                        options['max_requests'],
+                    )
+                    for i in range(concurrency)
+                ]
+                results = [
+                    result for future in futures for result in future.result()
+                ]
+        finally:
+            if server is not None:
+                got_request_exception.disconnect(lock_counter)
+                server.shutdown()
+                server.server_close()
+            self.delete_users(credentials)
+        self.report(
+            summarize(results, time.time() - start),
+            lock_counter.count if server is not None else None
+        )
+
+    def report(self, summary, locked):
+        self.stdout.write(
+            f'Запросов: {summary["requests"]}, '
+            f'ошибок: {summary["errors"]}, '
+            f'пропускная способность: {summary["throughput"]:.1f} запр/с'
+        )
+        if locked is None:
+            self.stdout.write(
+                'database is locked: не считается для внешнего сервера'
+            )
+        else:
+            self.stdout.write(f'database is locked: {locked}')
+        self.stdout.write(
+            f'{"сценарий":<10}{"запросов":>10}{"ошибок":>8}'
+            f'{"p50":>9}{"p90":>9}{"p95":>9}{"p99":>9}  (мс)'
+        )
+        for row in summary['rows']:
+            self.stdout.write(
+                f'{row["scenario"]:<10}{row["requests"]:>10}'
+                f'{row["errors"]:>8}{row["p50"]:>9.1f}{row["p90"]:>9.1f}'
+                f'{row["p95"]:>9.1f}{row["p99"]:>9.1f}'
+            )
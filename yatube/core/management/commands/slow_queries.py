@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Sum
+
+from core.models import SlowQuery
+
+ORDERINGS = {
+    'total': '-total',
+    'count': '-calls',
+    'max': '-slowest',
+}
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных SQL-запросов по отпечаткам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Сколько отпечатков показать')
+        parser.add_argument('--order', choices=tuple(ORDERINGS),
+                            default='total', help='Порядок сортировки')
+        parser.add_argument('--view', help='Только для этого представления')
+        parser.add_argument('--sources', type=int, default=3,
+                            help='Сколько мест вызова показать для запроса')
+        parser.add_argument('--clear', action='store_true',
+                            help='Очистить журнал')
+
+    def handle(self, *args, **options):
+        queryset = SlowQuery.objects.all()
+        if options['view']:
+            queryset = queryset.filter(view_name=options['view'])
+        if options['clear']:
+            deleted, _ = queryset.delete()
+            self.stdout.write(f'Удалено записей: {deleted}')
+            return
+        fingerprints = queryset.values('fingerprint').annotate(
+            calls=Sum('count'),
+            total=Sum('total_time'),
+            slowest=Max('max_time'),
+            places=Count('pk'),
+        ).order_by(ORDERINGS[options['order']])[:options['limit']]
+        for row in fingerprints:
+            entries = list(queryset.filter(
+                fingerprint=row['fingerprint']
+            ).order_by('-total_time'))
+            self.stdout.write(
+                f'{row["fingerprint"]}  вызовов: {row["calls"]}, '
+                f'всего: {row["total"]:.1f} мс, '
+                f'среднее: {row["total"] / row["calls"]:.1f} мс, '
+                f'максимум: {row["slowest"]:.1f} мс'
+            )
+            self.stdout.write(f'  {entries[0].sql}')
+            for entry in entries[:options['sources']]:
+                self.stdout.write(
+                    f'  {entry.count:>6} x  {entry.view_name}  '
+                    f'{entry.source or "-"}'
+                )
+            if row['places'] > options['sources']:
+                self.stdout.write(
+                    f'  ... ещё мест: {row["places"] - options["sources"]}'
+                )
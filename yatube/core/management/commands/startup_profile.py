@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.startup import TARGETS, measure_startup
+
+
+class Command(BaseCommand):
+    help = 'Замеряет холодный старт и время импорта каждого модуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=tuple(TARGETS),
+                            action='append',
+                            help='Что замерять; по умолчанию всё')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько самых медленных импортов показать')
+        parser.add_argument('--sort', choices=('cumulative', 'self'),
+                            default='cumulative',
+                            help='Сортировка: с вложенными импортами '
+                                 'или собственное время модуля')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Сколько запусков сделать, берётся лучший')
+
+    def handle(self, *args, **options):
+        for target in options['target'] or TARGETS:
+            report = min(
+                (measure_startup(target) for _ in range(options['repeat'])),
+                key=lambda report: report.wall_time
+            )
+            self.stdout.write(
+                f'{target}: {report.wall_time:.3f} с '
+                f'(бюджет {settings.STARTUP_TIME_BUDGET:.1f} с), '
+                f'модулей: {len(report.imports)}'
+            )
+            for name, own, cumulative in report.slowest(
+                options['top'], options['sort']
+            ):
+                self.stdout.write(
+                    f'  {cumulative * 1000:8.1f} мс {own * 1000:8.1f} мс  '
+                    f'{name}'
+                )
+            loaded = report.loaded_deferred()
+            if loaded:
+                self.stdout.write(self.style.WARNING(
+                    'Загружены при старте: ' + ', '.join(loaded)
+                ))
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_slowquery'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='slowquery',
+            name='example_params',
+        ),
+        migrations.RemoveField(
+            model_name='slowquery',
+            name='example_sql',
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class ProfileDump(models.Model):
+    TRIGGER_CHOICES = (
+        ('staff', 'Запрос персонала'),
+        ('sample', 'Выборка'),
+    )
+
+    created = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True
+    )
+    method = models.CharField(verbose_name='Метод', max_length=10)
+    path = models.CharField(verbose_name='Адрес', max_length=2000)
+    status = models.PositiveSmallIntegerField(verbose_name='Код ответа')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Пользователь',
+        related_name='+'
+    )
+    trigger = models.CharField(
+        verbose_name='Причина',
+        max_length=10,
+        choices=TRIGGER_CHOICES
+    )
+    duration = models.FloatField(verbose_name='Время, мс')
+    sql_count = models.PositiveIntegerField(verbose_name='SQL-запросов')
+    sql_time = models.FloatField(verbose_name='Время SQL, мс')
+    template_time = models.FloatField(verbose_name='Время шаблонов, мс')
+    file_name = models.CharField(verbose_name='Файл', max_length=255)
+    summary = models.TextField(verbose_name='Сводка')
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self) -> str:
+        return f'{self.method} {self.path} ({self.duration:.0f} мс)'
+
+
+class SlowQuery(models.Model):
+    """Медленные запросы, сгруппированные по отпечатку и месту вызова."""
+
+    fingerprint = models.CharField(
+        verbose_name='Отпечаток',
+        max_length=32,
+        db_index=True
+    )
+    sql = models.TextField(verbose_name='Нормализованный SQL')
+    view_name = models.CharField(
+        verbose_name='Представление',
+        max_length=200,
+        db_index=True
+    )
+    source = models.CharField(verbose_name='Источник', max_length=255)
+    count = models.PositiveIntegerField(verbose_name='Количество', default=0)
+    total_time = models.FloatField(verbose_name='Общее время, мс', default=0)
+    max_time = models.FloatField(verbose_name='Максимум, мс', default=0)
+    first_seen = models.DateTimeField(
+        verbose_name='Впервые',
+        auto_now_add=True
+    )
+    last_seen = models.DateTimeField(verbose_name='Последний раз')
+
+    class Meta:
+        ordering = ('-total_time',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint', 'view_name', 'source'],
+                name='unique_slow_query'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.sql[:80]
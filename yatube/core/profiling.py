@@ -0,0 +1,164 @@
+"""Профилирование отдельных запросов через cProfile.
+
+Профиль снимается для всего вызова представления вместе с рендерингом
+шаблонов. Время SQL замеряется обёрткой над курсором, время шаблонов
+берётся из накопленного времени Template.render в статистике профиля.
+Сам профиль сохраняется на диск в формате pstats, его можно открыть
+в snakeviz или python -m pstats.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ProfileDump
+
+SUMMARY_LINES = 40
+
+
+class QueryTimer:
+    """Обёртка над execute, которая считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.time += duration
+            self.queries.append((duration, sql))
+
+
+def get_trigger(request):
+    """Причина профилирования запроса или None, если профиль не нужен."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff and (
+        request.GET.get('profile') or request.META.get('HTTP_X_PROFILE')
+    ):
+        return 'staff'
+    if random.random() < settings.PROFILING_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+
+def get_template_time(stats):
+    """Накопленное время рендеринга шаблонов в секундах.
+
+    cumtime не учитывает рекурсивные вызовы повторно, поэтому вложенные
+    include и extends не удваивают время.
+    """
+    total = 0.0
+    for (filename, _, function), row in stats.stats.items():
+        if function == 'render' and filename.endswith(
+            os.path.join('django', 'template', 'base.py')
+        ):
+            total = max(total, row[3])
+    return total
+
+
+def format_summary(stats, timer):
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    stream.write('\nСамые долгие SQL-запросы:\n')
+    for duration, sql in sorted(timer.queries, reverse=True)[:10]:
+        stream.write(f'{duration * 1000:8.1f} мс  {sql}\n')
+    return stream.getvalue()
+
+
+def remove_old_dumps():
+    """Удаляет профили старше срока хранения и сверх лимита по числу."""
+    expired = ProfileDump.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            days=settings.PROFILING_MAX_AGE_DAYS
+        )
+    )
+    excess = ProfileDump.objects.order_by('-created')[
+        settings.PROFILING_MAX_DUMPS:
+    ]
+    stale = list(expired.values_list('pk', 'file_name'))
+    stale += list(excess.values_list('pk', 'file_name'))
+    if not stale:
+        return
+    for _, file_name in stale:
+        try:
+            os.remove(os.path.join(settings.PROFILING_ROOT, file_name))
+        except FileNotFoundError:
+            pass
+    ProfileDump.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+
+
+def save_dump(request, response, trigger, profiler, timer, duration):
+    os.makedirs(settings.PROFILING_ROOT, exist_ok=True)
+    file_name = (
+        f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.prof'
+    )
+    profiler.dump_stats(os.path.join(settings.PROFILING_ROOT, file_name))
+    stats = pstats.Stats(profiler)
+    user = getattr(request, 'user', None)
+    dump = ProfileDump.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        status=response.status_code,
+        user=user if user is not None and user.is_authenticated else None,
+        trigger=trigger,
+        duration=duration * 1000,
+        sql_count=timer.count,
+        sql_time=timer.time * 1000,
+        template_time=get_template_time(stats) * 1000,
+        file_name=file_name,
+        summary=format_summary(stats, timer),
+    )
+    remove_old_dumps()
+    return dump
+
+
+class RequestProfilerMiddleware:
+    """Снимает профиль запроса по требованию персонала или по выборке.
+
+    Стоит после AuthenticationMiddleware, чтобы видеть пользователя.
+    Потоковые ответы профилируются только до начала отдачи тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        timer = QueryTimer()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Другой профилировщик уже работает в этом потоке.
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        dump = save_dump(
+            request, response, trigger, profiler, timer,
+            time.perf_counter() - start
+        )
+        if request.user.is_staff:
+            # Номера профилей видит только персонал.
+            response['X-Profile-Id'] = str(dump.pk)
+        return response
@@ -0,0 +1,162 @@
+"""Журнал медленных SQL-запросов.
+
+Каждый запрос дольше SLOW_QUERY_THRESHOLD_MS запоминается вместе с именем
+представления и местом, откуда он был вызван: узлом шаблона, например
+{{ post.author.posts.count }} в posts/post_detail.html, или строкой кода
+проекта. В конце HTTP-запроса записи складываются в SlowQuery по
+нормализованному отпечатку. Хранится только нормализованный SQL: значения
+параметров могут содержать данные пользователей.
+
+Журнал включается порогом SLOW_QUERY_THRESHOLD_MS. Ошибка записи журнала
+только пишется в лог и не меняет ответ.
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?')
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+
+TEMPLATE_BASE = os.path.join('django', 'template', 'base.py')
+# Обёртки над курсором из этих модулей не считаются местом вызова.
+INSTRUMENTATION_MODULES = {'core.profiling', 'core.slowlog', 'core.timing'}
+TAG_FORMATS = {'VAR': '{{{{ {} }}}}', 'BLOCK': '{{% {} %}}'}
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(sql):
+    """Заменяет литералы и параметры на ?, а списки IN - на (...)."""
+    sql = STRING_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def get_fingerprint(normalized):
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def find_source(frame):
+    """Узел шаблона или строка кода проекта, вызвавшие запрос.
+
+    Ищется ближайший к запросу узел шаблона: он точнее указывает на
+    причину, чем код представления, передавший ленивый QuerySet.
+    """
+    project_frame = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (frame.f_code.co_name == 'render_annotated'
+                and filename.endswith(TEMPLATE_BASE)):
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                tag = TAG_FORMATS.get(token.token_type.name, '{}')
+                return (
+                    f'{origin.template_name}:{token.lineno} '
+                    + tag.format(token.contents)
+                )[:255]
+        if (project_frame is None
+                and filename.startswith(settings.BASE_DIR)
+                and frame.f_globals.get('__name__')
+                not in INSTRUMENTATION_MODULES):
+            project_frame = frame
+        frame = frame.f_back
+    if project_frame is None:
+        return ''
+    code = project_frame.f_code
+    path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+    return f'{path}:{project_frame.f_lineno} {code.co_name}'[:255]
+
+
+class SlowQueryCollector:
+    """Обёртка над execute, которая запоминает медленные запросы."""
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+        self.queries = []
+
+    def get_view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        if match is None:
+            return self.request.path[:200]
+        return match.view_name[:200]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= self.threshold:
+                self.queries.append((
+                    sql,
+                    duration,
+                    self.get_view_name(),
+                    find_source(sys._getframe(1)),
+                ))
+
+
+def record_slow_queries(queries):
+    now = timezone.now()
+    for sql, duration, view_name, source in queries:
+        normalized = normalize_sql(sql)
+        fingerprint = get_fingerprint(normalized)
+        entry, created = SlowQuery.objects.get_or_create(
+            fingerprint=fingerprint,
+            view_name=view_name,
+            source=source,
+            defaults={
+                'sql': normalized,
+                'count': 1,
+                'total_time': duration,
+                'max_time': duration,
+                'last_seen': now,
+            }
+        )
+        if not created:
+            SlowQuery.objects.filter(pk=entry.pk).update(
+                count=F('count') + 1,
+                total_time=F('total_time') + duration,
+                max_time=Greatest('max_time', Value(duration)),
+                last_seen=now,
+            )
+
+
+class SlowQueryMiddleware:
+    """Собирает медленные запросы за время обработки HTTP-запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold < 0:
+            return self.get_response(request)
+        collector = SlowQueryCollector(request, threshold)
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        if collector.queries:
+            try:
+                with transaction.atomic():
+                    record_slow_queries(collector.queries)
+            except Exception:
+                logger.exception('Slow query log write failed')
+        return response
@@ -0,0 +1,102 @@
+"""Замер холодного старта в отдельном процессе через python -X importtime."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+# Код, который выполняется при старте: manage - django.setup() перед
+# любой командой, wsgi - загрузка приложения и URL перед первым запросом.
+TARGETS = {
+    'manage': 'import django\ndjango.setup()',
+    'wsgi': (
+        'import yatube.wsgi\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns'
+    ),
+}
+# Модули, которые не должны загружаться при старте: они нужны только при
+# обработке картинок или в отдельных командах.
+DEFERRED_MODULES = {
+    'manage': (
+        'PIL',
+        'requests',
+        'sorl.thumbnail.base',
+        'sorl.thumbnail.engines',
+        'posts.admin',
+        'users.admin',
+    ),
+    'wsgi': (
+        'PIL',
+        'requests',
+        'sorl.thumbnail.base',
+        'sorl.thumbnail.engines',
+    ),
+}
+MODULES_MARKER = '--modules--'
+
+
+class StartupReport:
+    def __init__(self, target, wall_time, imports, modules):
+        self.target = target
+        self.wall_time = wall_time
+        # (модуль, собственное время, время с вложенными импортами), в с.
+        self.imports = imports
+        self.modules = modules
+
+    def slowest(self, count, key='cumulative'):
+        index = 2 if key == 'cumulative' else 1
+        return sorted(
+            self.imports, key=lambda row: row[index], reverse=True
+        )[:count]
+
+    def loaded_deferred(self):
+        return [
+            name for name in DEFERRED_MODULES[self.target]
+            if name in self.modules
+        ]
+
+
+def parse_importtime(output):
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((
+            name.strip(), int(own) / 10 ** 6, int(cumulative) / 10 ** 6
+        ))
+    return imports
+
+
+def measure_startup(target):
+    """Запускает старт в чистом интерпретаторе и собирает отчёт."""
+    code = (
+        f'{TARGETS[target]}\n'
+        'import json, sys\n'
+        f'print({MODULES_MARKER!r})\n'
+        'print(json.dumps(sorted(sys.modules)))'
+    )
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        'WARMUP_ON_START': '0',
+        'PYTHONPATH': os.pathsep.join(path for path in sys.path if path),
+    }
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    wall_time = time.perf_counter() - start
+    modules = json.loads(result.stdout.split(MODULES_MARKER)[-1])
+    return StartupReport(
+        target, wall_time, parse_importtime(result.stderr), set(modules)
+    )
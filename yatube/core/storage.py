@@ -0,0 +1,50 @@
+"""Файловое хранилище с адресацией по содержимому.
+
+Имя сохраняемого файла - SHA-256 его содержимого в каталоге, который
+задал upload_to: posts/small.gif превращается в posts/3f/3f…9a.gif.
+Побайтно одинаковые загрузки получают одно имя, поэтому хранятся один
+раз, а sorl-thumbnail, который ключует миниатюры по имени исходника,
+делает для них одни и те же миниатюры.
+
+Если имя уже адресовано по содержимому (posts/3f/3f…9a.gif), каталог
+хеша из него убирается, а не вкладывается ещё раз: повторное
+сохранение того же содержимого даёт то же имя.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+
+
+def get_content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name, content):
+        dirname, filename = os.path.split(name)
+        stem, extension = os.path.splitext(filename)
+        parent, segment = os.path.split(dirname)
+        if DIGEST_RE.fullmatch(stem) and segment == stem[:2]:
+            dirname = parent
+        digest = get_content_hash(content)
+        extension = extension.lower()
+        return os.path.join(dirname, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            return name
+        return self._save(name, content)
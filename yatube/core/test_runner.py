@@ -0,0 +1,29 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты с хранилищем миниатюр во временном каталоге.
+
+    Иначе тесты писали бы сведения о своих миниатюрах в файл узла
+    THUMBNAIL_KVSTORE_PATH. Путь меняется прямо в настройках, а не через
+    override_settings: тот скрыл бы SETTINGS_MODULE, который нужен
+    замеру старта в core.startup.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.kvstore_dir = tempfile.mkdtemp()
+        self.kvstore_path = settings.THUMBNAIL_KVSTORE_PATH
+        settings.THUMBNAIL_KVSTORE_PATH = os.path.join(
+            self.kvstore_dir, 'thumbnails.sqlite3'
+        )
+
+    def teardown_test_environment(self, **kwargs):
+        settings.THUMBNAIL_KVSTORE_PATH = self.kvstore_path
+        shutil.rmtree(self.kvstore_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from core.kvstore import LRUCache, SQLiteKVStore
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+KVSTORE_PATH = os.path.join(TEMP_ROOT, 'thumbnails.sqlite3')
+
+
+class QueryLog:
+    """Запросы SELECT, выполненные соединением хранилища."""
+
+    def __init__(self, kvstore):
+        self.connection = kvstore.connection
+        self.selects = []
+
+    def __enter__(self):
+        self.connection.set_trace_callback(self.trace)
+        return self
+
+    def __exit__(self, *args):
+        self.connection.set_trace_callback(None)
+
+    def trace(self, statement):
+        if statement.startswith('SELECT'):
+            self.selects.append(statement)
+
+
+@override_settings(THUMBNAIL_KVSTORE_PATH=KVSTORE_PATH)
+class TestSQLiteKVStore(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        if os.path.exists(KVSTORE_PATH):
+            SQLiteKVStore().clear()
+
+    def test_lru_evicts_least_recent(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b', None), None)
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_lru_expires(self):
+        lru = LRUCache(2, timeout=60)
+        with mock.patch('core.kvstore.time.monotonic', return_value=100):
+            lru.set('a', 1)
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('core.kvstore.time.monotonic', return_value=160):
+            self.assertIs(lru.get('a', None), None)
+        self.assertEqual(len(lru.items), 0)
+
+    def test_deleted_by_other_process(self):
+        reader, writer = SQLiteKVStore(), SQLiteKVStore()
+        writer._set_raw('sorl-thumbnail||image||one', '{"name": "one"}')
+        self.assertIsNotNone(reader._get_raw('sorl-thumbnail||image||one'))
+        writer._delete_raw('sorl-thumbnail||image||one')
+        timeout = settings.THUMBNAIL_KVSTORE_LRU_TIMEOUT
+        with mock.patch(
+            'core.kvstore.time.monotonic',
+            return_value=time.monotonic() + timeout
+        ):
+            self.assertIsNone(reader._get_raw('sorl-thumbnail||image||one'))
+
+    def test_shared_between_processes(self):
+        writer, reader = SQLiteKVStore(), SQLiteKVStore()
+        writer._set_raw('sorl-thumbnail||image||one', '{"name": "one"}')
+        self.assertEqual(
+            reader._get_raw('sorl-thumbnail||image||one'), '{"name": "one"}'
+        )
+        self.assertEqual(
+            list(reader._find_keys('image')), ['one']
+        )
+        writer._delete_raw('sorl-thumbnail||image||one')
+        self.assertIsNone(
+            SQLiteKVStore()._get_raw('sorl-thumbnail||image||one')
+        )
+
+    def test_prefetch_is_one_query(self):
+        writer = SQLiteKVStore()
+        for number in range(10):
+            writer._set(f'key{number}', [number], identity='thumbnails')
+        kvstore = SQLiteKVStore()
+        keys = [f'key{number}' for number in range(12)]
+        with QueryLog(kvstore) as log:
+            kvstore.prefetch(keys, identity='thumbnails')
+            values = [kvstore._get(key, identity='thumbnails') for key in keys]
+        self.assertEqual(
+            values, [[number] for number in range(10)] + [None] * 2
+        )
+        self.assertEqual(len(log.selects), 1)
+
+
+@override_settings(THUMBNAIL_KVSTORE_PATH=KVSTORE_PATH)
+class TestPagePrefetch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author,
+                 image=f'posts/{number}.gif')
+            for number in range(settings.POSTS_ON_PAGE)
+        )
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.lru.clear()
+
+    def test_page_thumbnails_resolved_in_one_query(self):
+        requested = []
+        get_raw = default.kvstore._get_raw
+
+        def record(key):
+            requested.append(key)
+            return get_raw(key)
+
+        default.kvstore._get_raw = record
+        try:
+            # Файлов картинок нет, sorl пишет ошибки в журнал.
+            with QueryLog(default.kvstore) as log, \
+                    self.assertLogs('sorl.thumbnail', 'ERROR'):
+                Client().get(reverse('posts:index'))
+        finally:
+            del default.kvstore._get_raw
+        self.assertEqual(len(requested), settings.POSTS_ON_PAGE)
+        self.assertEqual(len(log.selects), 1)
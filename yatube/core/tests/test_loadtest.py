@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from core.loadtest import parse_mix, percentile, summarize
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TestLoadtestHelpers(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix('index=3, create=1,post=0'),
+            {'index': 3, 'create': 1}
+        )
+        with self.assertRaises(ValueError):
+            parse_mix('index=3,unknown=1')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_summarize(self):
+        results = [
+            ('index', 200, 0.01, ''),
+            ('index', 500, 0.03, ''),
+            ('post', 0, 0.02, 'ConnectTimeout'),
+        ]
+        summary = summarize(results, elapsed=2)
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['throughput'], 1.5)
+        index = summary['rows'][0]
+        self.assertEqual(index['scenario'], 'index')
+        self.assertEqual(index['errors'], 1)
+        self.assertEqual(index['p99'], 30)
+
+
+class TestLoadtestCommand(LiveServerTestCase):
+    def test_command(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+        out = StringIO()
+        call_command(
+            'loadtest',
+            url=self.live_server_url,
+            mix='index=1,post=1,follow=1,create=1',
+            concurrency=2,
+            users=1,
+            max_requests=3,
+            stdout=out
+        )
+        report = out.getvalue()
+        self.assertIn('Запросов: 6, ошибок: 0', report)
+        self.assertIn('не считается для внешнего сервера', report)
+        self.assertFalse(
+            User.objects.filter(username__startswith='loadtest_').exists()
+        )
+        self.assertEqual(Post.objects.get().author, author)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import ProfileDump
+from posts.models import Group, Post
+
+User = get_user_model()
+
+TEMP_PROFILING_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_ROOT=TEMP_PROFILING_ROOT)
+class TestRequestProfiler(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_superuser(
+            username='staff', email='staff@example.com', password='pass'
+        )
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_PROFILING_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILING_ROOT, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user)
+
+    def test_staff_can_request_profile(self):
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        response = self.staff_client.get(url, {'profile': '1'})
+        dump = ProfileDump.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(dump.pk))
+        self.assertEqual(dump.trigger, 'staff')
+        self.assertEqual(dump.status, 200)
+        self.assertGreater(dump.sql_count, 0)
+        self.assertGreater(dump.template_time, 0)
+        self.assertIn('SQL', dump.summary)
+        self.assertTrue(os.path.exists(
+            os.path.join(TEMP_PROFILING_ROOT, dump.file_name)
+        ))
+        response = self.staff_client.get(
+            reverse('admin:core_profiledump_download', args=(dump.pk,))
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_header_triggers_profile(self):
+        self.staff_client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+        self.assertEqual(ProfileDump.objects.count(), 1)
+
+    def test_regular_user_cannot_request_profile(self):
+        self.reader_client.get(reverse('posts:index'), {'profile': '1'})
+        self.assertFalse(ProfileDump.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_are_profiled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(ProfileDump.objects.get().trigger, 'sample')
+        self.assertNotIn('X-Profile-Id', response)
+
+    @override_settings(PROFILING_MAX_DUMPS=2)
+    def test_old_dumps_are_removed(self):
+        for _ in range(3):
+            self.staff_client.get(reverse('posts:index'), {'profile': '1'})
+        self.assertEqual(ProfileDump.objects.count(), 2)
+        self.assertEqual(
+            sorted(os.listdir(TEMP_PROFILING_ROOT)),
+            sorted(ProfileDump.objects.values_list('file_name', flat=True))
+        )
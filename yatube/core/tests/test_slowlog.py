@@ -0,0 +1,95 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import SlowQuery
+from core.slowlog import get_fingerprint, normalize_sql
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class TestNormalizeSql(TestCase):
+    def test_literals_and_params_are_replaced(self):
+        self.assertEqual(
+            normalize_sql(
+                'SELECT  "id" FROM "posts_post"\n'
+                "WHERE \"text\" = 'it''s' AND \"id\" IN (%s, %s, %s) "
+                'LIMIT 21'
+            ),
+            'SELECT "id" FROM "posts_post" WHERE "text" = ? '
+            'AND "id" IN (...) LIMIT ?'
+        )
+
+    def test_same_shape_gives_same_fingerprint(self):
+        self.assertEqual(
+            get_fingerprint(normalize_sql('SELECT 1 WHERE id IN (%s)')),
+            get_fingerprint(normalize_sql('SELECT 2 WHERE id IN (%s, %s)'))
+        )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class TestSlowQueryLog(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(post=cls.post, author=cls.user, text='Текст')
+
+    def test_queries_are_attributed_to_view_and_source(self):
+        Client().get(reverse('posts:post_detail', args=(self.post.pk,)))
+        entries = SlowQuery.objects.filter(view_name='posts:post_detail')
+        self.assertTrue(entries.exists())
+        sources = set(entries.values_list('source', flat=True))
+        self.assertTrue(any(
+            source.startswith('posts/post_detail.html:') for source in sources
+        ), sources)
+        self.assertTrue(any(
+            source.startswith('posts/views.py:') for source in sources
+        ), sources)
+
+    def test_repeated_queries_are_aggregated(self):
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        Client().get(url)
+        first = dict(SlowQuery.objects.values_list('pk', 'count'))
+        Client().get(url)
+        second = dict(SlowQuery.objects.values_list('pk', 'count'))
+        self.assertEqual(set(first), set(second))
+        self.assertTrue(all(second[pk] == first[pk] + 1 for pk in first))
+
+    def test_parameters_are_not_stored(self):
+        User.objects.create_user(username='secret-user')
+        Client().get(reverse('posts:profile', args=('secret-user',)))
+        self.assertTrue(SlowQuery.objects.exists())
+        self.assertFalse(
+            SlowQuery.objects.filter(sql__contains='secret-user').exists()
+        )
+
+    def test_write_errors_do_not_break_response(self):
+        with mock.patch(
+            'core.slowlog.record_slow_queries', side_effect=RuntimeError
+        ), self.assertLogs('core.slowlog', 'ERROR'):
+            response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=-1)
+    def test_negative_threshold_disables_log(self):
+        Client().get(reverse('posts:index'))
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_command_prints_summary(self):
+        Client().get(reverse('posts:index'))
+        out = StringIO()
+        call_command('slow_queries', '--view', 'posts:index', stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        call_command('slow_queries', '--clear', stdout=StringIO())
+        self.assertFalse(SlowQuery.objects.exists())
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.startup import TARGETS, measure_startup, parse_importtime
+
+
+class TestStartup(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   posts.models\n'
+            'import time:      1500 |       2500 | posts\n'
+        )
+        self.assertEqual(parse_importtime(output), [
+            ('posts.models', 0.00012, 0.00012),
+            ('posts', 0.0015, 0.0025),
+        ])
+
+    def test_cold_start_budget(self):
+        for target in TARGETS:
+            with self.subTest(target=target):
+                report = measure_startup(target)
+                self.assertEqual(report.loaded_deferred(), [])
+                self.assertLess(
+                    report.wall_time, settings.STARTUP_TIME_BUDGET
+                )
@@ -0,0 +1,40 @@
+import shutil
+import tempfile
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class TestContentAddressedStorage(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage(location=TEMP_MEDIA_ROOT)
+
+    def test_name_from_content(self):
+        digest = sha256(b'first').hexdigest()
+        for name in ('posts/first.GIF', 'posts/copy.gif'):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.storage.save(name, ContentFile(b'first')),
+                    f'posts/{digest[:2]}/{digest}.gif'
+                )
+
+    def test_save_stored_file_again(self):
+        stored = self.storage.save('posts/photo.jpg', ContentFile(b'first'))
+        with self.storage.open(stored) as file:
+            self.assertEqual(self.storage.save(stored, file), stored)
+        digest = sha256(b'second').hexdigest()
+        self.assertEqual(
+            self.storage.save(stored, ContentFile(b'second')),
+            f'posts/{digest[:2]}/{digest}.jpg'
+        )
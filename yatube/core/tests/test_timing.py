@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SERVER_TIMING=True)
+class TestServerTiming(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_metrics(self, response):
+        return {
+            metric.split(';')[0]: metric
+            for metric in response['Server-Timing'].split(', ')
+        }
+
+    def test_phases_are_reported(self):
+        response = Client().get(reverse('posts:group_index'))
+        metrics = self.get_metrics(response)
+        self.assertIn('db', metrics)
+        self.assertIn('tpl', metrics)
+        self.assertIn('cache', metrics)
+        self.assertIn('total', metrics)
+
+    def test_users_and_about_views_are_timed(self):
+        for url in (reverse('users:login'), reverse('about:author')):
+            with self.subTest(url=url):
+                self.assertIn('tpl', self.get_metrics(Client().get(url)))
+
+    def test_admin_is_not_timed(self):
+        response = Client().get(reverse('admin:login'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
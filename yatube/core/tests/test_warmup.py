@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.warmup import get_hot_paths, run_warmup, state
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    WARMUP_ON_START=True,
+    WARMUP_POPULAR_GROUPS=1,
+    WARMUP_POPULAR_PROFILES=1,
+    WARMUP_WORKERS=2,
+)
+class TestWarmup(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        state.ready.clear()
+        self.author = User.objects.create_user(username='author')
+        User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='popular', description='Описание'
+        )
+        Group.objects.create(title='Пустая', slug='empty', description='')
+        Post.objects.create(
+            text='Пост',
+            author=self.author,
+            group=self.group,
+        )
+
+    def test_hot_paths(self):
+        self.assertEqual(get_hot_paths(), [
+            reverse('posts:index'),
+            reverse('posts:group_index'),
+            reverse('posts:group_list', args=('popular',)),
+            reverse('posts:profile', args=('author',)),
+        ])
+
+    def test_not_ready_until_warmed(self):
+        response = Client().get(reverse('readiness'))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['ready'])
+        result = run_warmup()
+        self.assertTrue(result['ready'])
+        self.assertEqual(result['warmed'], 4)
+        self.assertEqual(result['failed'], [])
+        self.assertIsNotNone(
+            cache.get(make_template_fragment_key('index_page'))
+        )
+        response = Client().get(reverse('readiness'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_budget_marks_ready(self):
+        result = run_warmup(workers=1, budget=0)
+        self.assertTrue(result['ready'])
+        # Страницы, до которых очередь не дошла, отменены.
+        self.assertLess(result['warmed'], result['total'])
+
+    @override_settings(WARMUP_ON_START=False)
+    def test_ready_without_warmup(self):
+        response = Client().get(reverse('readiness'))
+        self.assertEqual(response.status_code, 200)
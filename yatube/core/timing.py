@@ -0,0 +1,168 @@
+"""Заголовок Server-Timing с разбивкой времени ответа по фазам.
+
+Фазы собираются в объект Timings текущего запроса: SQL - обёрткой над
+курсором, шаблоны - бэкендом TimedDjangoTemplates, кеш - бэкендом
+TimedLocMemCache, миниатюры - core.thumbnails.TimedThumbnailBackend.
+Вне запроса или при выключенном SERVER_TIMING каждая обёртка стоит одной
+проверки ContextVar.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+
+# Заголовки ответа допускают только ASCII, поэтому описания на английском.
+PHASES = (
+    ('db', 'DB'),
+    ('tpl', 'Templates'),
+    ('cache', 'Cache'),
+    ('thumb', 'Thumbnails'),
+)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class Timings:
+    """Суммарное время и число вызовов по фазам одного запроса."""
+
+    def __init__(self):
+        self.durations = dict.fromkeys((name for name, _ in PHASES), 0.0)
+        self.counts = dict.fromkeys(self.durations, 0)
+        self.active = set()
+
+    def add(self, phase, duration):
+        self.durations[phase] += duration
+        self.counts[phase] += 1
+
+    def header(self, total):
+        metrics = [
+            f'{name};dur={self.durations[name] * 1000:.1f};'
+            f'desc="{description} ({self.counts[name]})"'
+            for name, description in PHASES
+            if self.counts[name]
+        ]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed(phase):
+    """Добавляет время блока к фазе текущего запроса.
+
+    Вложенные вызовы одной фазы, например get_many поверх get, считаются
+    один раз.
+    """
+    timings = current_timings.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(phase)
+        timings.add(phase, time.perf_counter() - start)
+
+
+def time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+class TimedTemplate:
+    """Обёртка над шаблоном бэкенда, прозрачная для остальных атрибутов."""
+
+    def __init__(self, backend_template):
+        self.backend_template = backend_template
+
+    def __getattr__(self, name):
+        return getattr(self.backend_template, name)
+
+    def render(self, context=None, request=None):
+        with timed('tpl'):
+            return self.backend_template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий рендеринг шаблонов верхнего уровня.
+
+    Вложенные include и extends рендерятся внутри и отдельно не считаются.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedCacheMixin:
+    """Замеряет обращения к кешу; подмешивается к любому бэкенду."""
+
+    def get(self, *args, **kwargs):
+        with timed('cache'):
+            return super().get(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        with timed('cache'):
+            return super().get_many(*args, **kwargs)
+
+    def get_or_set(self, *args, **kwargs):
+        with timed('cache'):
+            return super().get_or_set(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        with timed('cache'):
+            return super().set(*args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        with timed('cache'):
+            return super().set_many(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        with timed('cache'):
+            return super().add(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        with timed('cache'):
+            return super().incr(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with timed('cache'):
+            return super().delete(*args, **kwargs)
+
+
+class TimedLocMemCache(TimedCacheMixin, LocMemCache):
+    pass
+
+
+class ServerTimingMiddleware:
+    """Добавляет Server-Timing к ответам представлений из
+    SERVER_TIMING_NAMESPACES, если включён SERVER_TIMING."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SERVER_TIMING:
+            return self.get_response(request)
+        timings = Timings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(time_query):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        match = getattr(request, 'resolver_match', None)
+        if (match is not None
+                and match.namespace in settings.SERVER_TIMING_NAMESPACES):
+            response['Server-Timing'] = timings.header(
+                time.perf_counter() - start
+            )
+        return response
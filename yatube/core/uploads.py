@@ -0,0 +1,92 @@
+"""Загрузка файлов с ранними ограничениями.
+
+LimitedUploadHandler стоит первым в FILE_UPLOAD_HANDLERS и считает байты
+каждого файла по мере чтения запроса: файл больше FILE_UPLOAD_MAX_SIZE
+пропускается целиком, а остаток его данных читается и выбрасывается.
+Следом TemporaryFileUploadHandler пишет файл на диск кусками, поэтому
+память на загрузку не зависит от размера файла.
+
+validate_image_pixels проверяет размер картинки в пикселях только по
+заголовку, без раскодирования. Полная проверка идёт вне запроса, в
+posts.images.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+
+REJECTED_UPLOADS_ATTR = 'rejected_uploads'
+
+
+def get_rejected_uploads(request):
+    """Ошибки файлов запроса, пропущенных LimitedUploadHandler."""
+    return getattr(request, REJECTED_UPLOADS_ATTR, {})
+
+
+class RejectedUploadsMixin:
+    """Форма, которая показывает ошибки файлов, пропущенных
+    LimitedUploadHandler: без файла поле иначе выглядит пустым."""
+
+    rejected_uploads = {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, error in self.rejected_uploads.items():
+            if field in self.fields:
+                self.add_error(field, error)
+        return cleaned_data
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        if (self.content_length or 0) > settings.FILE_UPLOAD_MAX_SIZE:
+            self.reject()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            self.reject()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def reject(self):
+        if not hasattr(self.request, REJECTED_UPLOADS_ATTR):
+            setattr(self.request, REJECTED_UPLOADS_ATTR, {})
+        get_rejected_uploads(self.request)[self.field_name] = (
+            'Файл больше '
+            f'{filesizeformat(settings.FILE_UPLOAD_MAX_SIZE)}'
+        )
+        raise SkipFile
+
+
+def validate_image_pixels(value):
+    """Отклоняет новую картинку больше IMAGE_MAX_PIXELS по её заголовку.
+
+    Уже сохранённые файлы не перечитываются.
+    """
+    if getattr(value, '_committed', False):
+        return
+
+    from PIL import Image
+
+    too_many_pixels = ValidationError(
+        'Картинка больше %(limit)s мегапикселей.',
+        code='too_many_pixels',
+        params={'limit': settings.IMAGE_MAX_PIXELS // 10 ** 6},
+    )
+    try:
+        with Image.open(value) as image:
+            width, height = image.size
+    except Image.DecompressionBombError as exc:
+        raise too_many_pixels from exc
+    except (OSError, ValueError):
+        # Формат проверяет forms.ImageField, здесь важен только размер.
+        return
+    finally:
+        value.seek(0)
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise too_many_pixels
@@ -1,5 +1,8 @@
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .warmup import state
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +14,9 @@ def csrf_failure(request, reason=''):
 
 def server_error(request, reason=''):
     return render(request, 'core/500.html')
+
+
+def readiness(request):
+    """503, пока рабочий процесс не прогрет, затем 200."""
+    status = state.as_dict()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
@@ -0,0 +1,173 @@
+"""Прогрев рабочего процесса после старта.
+
+Горячие страницы (главная, популярные группы и профили) запрашиваются
+через WSGI-обработчик так же, как живой трафик. Поэтому заполняются
+фрагментный кеш, кеши представлений и счётчиков, а тег thumbnail
+создаёт недостающие миниатюры постов на этих страницах. Пока прогрев
+не закончился или не вышел его бюджет времени, /ready/ отвечает 503.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db.models import Count
+from django.urls import reverse
+
+from posts.models import Group, User
+
+
+class WarmupState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.started = None
+        self.finished = None
+        self.total = 0
+        self.results = {}
+
+    def start(self, total):
+        with self.lock:
+            self.ready.clear()
+            self.started = time.time()
+            self.finished = None
+            self.total = total
+            self.results = {}
+
+    def add_result(self, path, status):
+        with self.lock:
+            self.results[path] = status
+
+    def finish(self):
+        with self.lock:
+            self.finished = time.time()
+        self.ready.set()
+
+    def as_dict(self):
+        with self.lock:
+            end = self.finished or time.time()
+            return {
+                'ready': self.is_ready(),
+                'warmed': len(self.results),
+                'total': self.total,
+                'failed': sorted(
+                    path for path, status in self.results.items()
+                    if status >= 400
+                ),
+                'elapsed': round(end - self.started, 3)
+                if self.started else 0,
+            }
+
+    def is_ready(self):
+        return not settings.WARMUP_ON_START or self.ready.is_set()
+
+
+state = WarmupState()
+
+
+def get_hot_paths():
+    """Адреса страниц для прогрева: из настроек и самые наполненные
+    группы и профили."""
+    paths = [reverse(name) for name in settings.WARMUP_PAGES]
+    groups = Group.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').values_list('slug', flat=True)
+    paths += [
+        reverse('posts:group_list', args=(slug,))
+        for slug in groups[:settings.WARMUP_POPULAR_GROUPS]
+    ]
+    authors = User.objects.annotate(
+        posts_count=Count('posts')
+    ).filter(posts_count__gt=0).order_by(
+        '-posts_count'
+    ).values_list('username', flat=True)
+    paths += [
+        reverse('posts:profile', args=(username,))
+        for username in authors[:settings.WARMUP_POPULAR_PROFILES]
+    ]
+    return paths
+
+
+def get_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host[0] not in '.*':
+            return host
+    return 'localhost'
+
+
+def fetch(handler, path, host):
+    """Отдаёт страницу через обработчик и возвращает код ответа."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    response = handler(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+def warm_page(handler, path, host):
+    try:
+        status = fetch(handler, path, host)
+    except Exception:
+        status = 500
+    state.add_result(path, status)
+
+
+def run_warmup(workers=None, budget=None):
+    """Прогревает горячие страницы пулом потоков в пределах бюджета.
+
+    Возвращает словарь состояния; готовность выставляется и тогда, когда
+    бюджет вышел раньше, чтобы процесс не остался неготовым навсегда.
+    """
+    workers = settings.WARMUP_WORKERS if workers is None else workers
+    budget = settings.WARMUP_TIME_BUDGET if budget is None else budget
+    executor = ThreadPoolExecutor(max(workers, 1))
+    futures = []
+    try:
+        paths = get_hot_paths()
+        state.start(len(paths))
+        handler = WSGIHandler()
+        host = get_host()
+        futures = [
+            executor.submit(warm_page, handler, path, host)
+            for path in paths
+        ]
+        wait(futures, timeout=budget)
+    finally:
+        # Не ждём зависшие страницы: готовность важнее полного прогрева.
+        # cancel_futures у shutdown есть только с Python 3.9.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        state.finish()
+    return state.as_dict()
+
+
+def start_warmup():
+    """Запускает прогрев в фоновом потоке, если он включён."""
+    if not settings.WARMUP_ON_START:
+        return None
+    state.start(0)
+    thread = threading.Thread(target=run_warmup, name='warmup', daemon=True)
+    thread.start()
+    return thread
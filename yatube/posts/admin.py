@@ -1,13 +1,41 @@
+from django.conf import settings
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from core.admin import ChunkedActionsMixin, RejectedUploadsAdminMixin
 
-admin.site.register(Comment)
-admin.site.register(Follow)
-admin.site.register(Group)
+from .forms import AuthorTransferForm, GroupReassignForm
+from .images import clear_image_metadata
+from .markup import prerender
+from .models import Comment, Follow, Group, Post, QuarantinedPost
+from .timeline import transfer_posts_in_chunks
+from .utils import (CachedCountPaginator, delete_comments_in_chunks,
+                    delete_posts_in_chunks, update_posts_in_chunks)
 
 
-class PostAdmin(admin.ModelAdmin):
+class BaseAdmin(admin.ModelAdmin):
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+class PrerenderedTextAdmin(BaseAdmin):
+    def save_model(self, request, obj, form, change):
+        prerender(obj)
+        super().save_model(request, obj, form, change)
+
+
+class GroupAdmin(BaseAdmin):
+    list_display = (
+        'pk',
+        'title',
+        'slug',
+    )
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class PostAdmin(ChunkedActionsMixin, RejectedUploadsAdminMixin,
+                PrerenderedTextAdmin):
     list_display = (
         'pk',
         'text',
@@ -16,9 +44,204 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    actions = ('delete_in_chunks', 'reassign_group', 'transfer_author')
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            clear_image_metadata(obj)
+        super().save_model(request, obj, form, change)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deletion_summary(self, queryset):
+        return (
+            (Post._meta.verbose_name_plural, queryset.count()),
+            (
+                Comment._meta.verbose_name_plural,
+                Comment.objects.filter(post__in=queryset).count()
+            ),
+        )
+
+    def get_deleted_objects(self, objs, request):
+        # Сводка вместо полного дерева связанных комментариев.
+        posts = Post.objects.filter(pk__in=[obj.pk for obj in objs])
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(Post._meta.verbose_name)
+        if not request.user.has_perm('posts.delete_comment'):
+            perms_needed.add(Comment._meta.verbose_name)
+        deleted_objects = [str(obj) for obj in objs]
+        return (
+            deleted_objects,
+            dict(self.get_deletion_summary(posts)),
+            perms_needed,
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Post.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for _ in delete_posts_in_chunks(queryset, settings.BULK_CHUNK_SIZE):
+            pass
+
+    def delete_in_chunks(self, request, queryset):
+        title = 'Удаление постов'
+        if not request.POST.get('post'):
+            return self.bulk_action_confirmation(
+                request,
+                'delete_in_chunks',
+                title,
+                self.get_deletion_summary(queryset)
+            )
+        return self.bulk_action_progress(
+            request,
+            title,
+            delete_posts_in_chunks(queryset, settings.BULK_CHUNK_SIZE),
+            queryset.count()
+        )
+
+    delete_in_chunks.allowed_permissions = ('delete',)
+    delete_in_chunks.short_description = 'Удалить выбранные посты пачками'
+
+    def run_update_action(self, request, queryset, action, title,
+                          form_class, get_values,
+                          update=update_posts_in_chunks):
+        form = form_class(request.POST if request.POST.get('post') else None)
+        if not form.is_valid():
+            return self.bulk_action_confirmation(
+                request,
+                action,
+                title,
+                ((Post._meta.verbose_name_plural, queryset.count()),),
+                form
+            )
+        return self.bulk_action_progress(
+            request,
+            title,
+            update(
+                queryset,
+                settings.BULK_CHUNK_SIZE,
+                **get_values(form.cleaned_data)
+            ),
+            queryset.count()
+        )
+
+    def reassign_group(self, request, queryset):
+        return self.run_update_action(
+            request,
+            queryset,
+            'reassign_group',
+            'Перенос постов в группу',
+            GroupReassignForm,
+            lambda data: {'group': data['group']}
+        )
+
+    reassign_group.allowed_permissions = ('change',)
+    reassign_group.short_description = 'Перенести выбранные посты в группу'
+
+    def transfer_author(self, request, queryset):
+        return self.run_update_action(
+            request,
+            queryset,
+            'transfer_author',
+            'Передача постов другому автору',
+            AuthorTransferForm,
+            lambda data: {'author': data['username']},
+            transfer_posts_in_chunks
+        )
+
+    transfer_author.allowed_permissions = ('change',)
+    transfer_author.short_description = 'Передать выбранные посты автору'
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        # Список групп выбирается одним запросом на всю страницу,
+        # а не отдельным запросом в каждой строке list_editable.
+        group_field = formset.form.base_fields['group']
+        group_field.choices = list(group_field.choices)
+        group_field.widget.widget.choices = group_field.choices
+        return formset
+
+
+class CommentAdmin(PrerenderedTextAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'created',
+        'author',
+        'post',
+    )
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    list_filter = ('created',)
+    date_hierarchy = 'created'
+    raw_id_fields = ('author', 'post')
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Comment.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for _ in delete_comments_in_chunks(
+            queryset, settings.BULK_CHUNK_SIZE
+        ):
+            pass
+
+
+class FollowAdmin(BaseAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'author',
+    )
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'author')
+
+
+class QuarantinedPostAdmin(RejectedUploadsAdminMixin, BaseAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'created',
+        'author',
+        'copies',
+    )
+    list_select_related = ('author',)
+    search_fields = ('text', 'author__username')
+    list_filter = ('created',)
+    raw_id_fields = ('author',)
+    actions = ('publish',)
+
+    def publish(self, request, queryset):
+        published = 0
+        for quarantined in queryset.select_related('author', 'group', 'post'):
+            post = quarantined.post or Post(author=quarantined.author)
+            if post.image != quarantined.image:
+                clear_image_metadata(post)
+            post.group = quarantined.group
+            post.text = quarantined.text
+            post.image = quarantined.image
+            prerender(post)
+            post.save()
+            quarantined.delete()
+            published += 1
+        self.message_user(request, f'Опубликовано постов: {published}')
+
+    publish.allowed_permissions = ('delete',)
+    publish.short_description = 'Опубликовать выбранные посты'
 
 
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(QuarantinedPost, QuarantinedPostAdmin)
@@ -0,0 +1,121 @@
+"""ETag для страниц лент и поста.
+
+Каждый валидатор стоит одного запроса по индексу и чтения поколения
+своего объекта из кэша: группы, автора или поста. Поколения меняют
+сигналы при записи постов, комментариев и групп, поэтому ETag учитывает
+и правки, которые не двигают даты, а запись в одной группе не сбрасывает
+ETag страниц других групп и авторов. Только главная зависит от любой
+записи и проверяется по общему поколению 'pages'. В ETag входит и
+посетитель: от него зависят шапка, кнопка подписки и форма комментария.
+Пока у посетителя есть непоказанные сообщения, ETag не выдаётся.
+
+Поколения лежат в кэше. Процессы видят записи друг друга, только если
+кэш общий (см. CACHES), поэтому в каждом ETag есть и часть из базы:
+дата последнего поста и число постов или комментариев.
+"""
+from hashlib import md5
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Count, Exists, Max, OuterRef
+
+from .models import Follow, Group, Post, User
+from .utils import get_cache_generation
+
+# Время жизни фрагмента {% cache 20 index_page %} в posts/index.html.
+INDEX_FRAGMENT_TIMEOUT = 20
+INDEX_GENERATION_KEY = 'index_page:generation'
+
+
+def make_etag(request, view_name, *parts):
+    if len(get_messages(request)):
+        # Сообщение показывается один раз, страницу с ним не кэшируем.
+        return None
+    viewer = request.user.pk if request.user.is_authenticated else 0
+    key = ':'.join(str(part) for part in (
+        view_name,
+        viewer,
+        request.GET.urlencode(),
+        *parts,
+    ))
+    return md5(key.encode()).hexdigest()
+
+
+def get_viewer_generation(request):
+    """Поколение рекомендаций и подписок посетителя."""
+    if not request.user.is_authenticated:
+        return 0
+    return (
+        get_cache_generation('suggestions'),
+        get_cache_generation(f'viewer:{request.user.pk}'),
+    )
+
+
+def index_etag(request):
+    """Главная кэширует список постов фрагментом на 20 секунд.
+
+    Пока фрагмент не истёк, страница не меняется вслед за записями,
+    поэтому в ETag входит поколение 'pages', при котором фрагмент был
+    заполнен, а не текущее. Дата последнего поста и число постов
+    замечают и записи других процессов, которые не меняют поколение в
+    кэше этого процесса.
+    """
+    generation = None
+    if cache.has_key(make_template_fragment_key('index_page')):
+        generation = cache.get(INDEX_GENERATION_KEY)
+    if generation is None:
+        generation = get_cache_generation('pages')
+        cache.set(INDEX_GENERATION_KEY, generation, INDEX_FRAGMENT_TIMEOUT)
+    posts = Post.objects.aggregate(latest=Max('pub_date'), count=Count('pk'))
+    return make_etag(
+        request, 'index', generation, posts['latest'], posts['count']
+    )
+
+
+def group_etag(request, slug):
+    group = Group.objects.filter(slug=slug).annotate(
+        latest=Max('posts__pub_date'), count=Count('posts')
+    ).values_list('pk', 'latest', 'count').first()
+    if group is None:
+        return None
+    return make_etag(
+        request, 'group', get_cache_generation(f'group:{group[0]}'), *group
+    )
+
+
+def profile_etag(request, username):
+    authors = User.objects.filter(username=username).annotate(
+        latest=Max('posts__pub_date'), count=Count('posts')
+    )
+    fields = ['pk', 'latest', 'count']
+    if request.user.is_authenticated:
+        authors = authors.annotate(is_followed=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk')
+        )))
+        fields.append('is_followed')
+    author = authors.values_list(*fields).first()
+    if author is None:
+        return None
+    return make_etag(
+        request,
+        'profile',
+        get_cache_generation(f'author:{author[0]}'),
+        get_viewer_generation(request),
+        *author
+    )
+
+
+def post_detail_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', 'comments_count', 'last_comment_at'
+    ).first()
+    if post is None:
+        return None
+    return make_etag(
+        request,
+        'post_detail',
+        get_cache_generation(f'post:{post_id}'),
+        post_id,
+        *post
+    )
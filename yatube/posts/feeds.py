@@ -0,0 +1,189 @@
+"""RSS- и Atom-ленты главной, групп и профилей.
+
+Агрегаторы опрашивают ленты очень часто. Поэтому дата последнего поста
+и готовое тело ленты лежат в кэше под ключом с поколением 'feeds', а
+поколение меняется сигналами при записи постов. На условный запрос
+ответ 304 отдаётся по дате последнего поста из кэша, и лента при этом
+не собирается.
+"""
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .models import Group, Post, User
+from .utils import get_cache_generation
+
+
+class PostsFeed(Feed):
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related(
+            'author', 'group'
+        ).order_by('-pub_date', '-pk')[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.excerpt or Truncator(item.text).words(10)
+
+    def item_description(self, item):
+        return item.text_html or linebreaks(item.text, autoescape=True)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_author_link(self, item):
+        return reverse('posts:profile', args=(item.author.username,))
+
+
+class IndexFeed(PostsFeed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def get_posts(self, group):
+        return group.posts.all()
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+
+class ProfileFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def get_posts(self, author):
+        return author.posts.all()
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Новые посты пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+
+class IndexAtomFeed(IndexFeed):
+    feed_type = Atom1Feed
+    subtitle = IndexFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return self.description(group)
+
+
+class ProfileAtomFeed(ProfileFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+LATEST_POSTS = {
+    'index': lambda: Post.objects.all(),
+    'group': lambda slug: Post.objects.filter(group__slug=slug),
+    'profile': lambda username: Post.objects.filter(
+        author__username=username
+    ),
+}
+
+
+def get_cache_key(prefix, kind, kwargs):
+    params = md5(repr(sorted(kwargs.items())).encode()).hexdigest()
+    return f'{prefix}:{get_cache_generation("feeds")}:{kind}:{params}'
+
+
+def get_latest_pub_date(kind, kwargs):
+    """Дата последнего поста ленты, берётся из кэша до записи постов."""
+    key = get_cache_key('feed_latest', kind, kwargs)
+    latest = cache.get(key)
+    if latest is None:
+        latest = LATEST_POSTS[kind](**kwargs).aggregate(
+            latest=Max('pub_date')
+        )['latest'] or ''
+        cache.set(key, latest, settings.FEED_CACHE_TIMEOUT)
+    return latest or None
+
+
+def cached_feed(feed, kind):
+    """Представление ленты с условным GET и кэшем готового тела.
+
+    ETag включает поколение кэша лент, поэтому меняется и при удалении
+    или правке постов, когда дата последнего поста остаётся прежней.
+    """
+
+    def last_modified(request, **kwargs):
+        return get_latest_pub_date(kind, kwargs)
+
+    def get_body_key(request, kwargs):
+        # В ленте абсолютные ссылки, поэтому тело зависит от хоста.
+        return get_cache_key(
+            f'feed:{feed.feed_type.__name__}:{request.get_host()}',
+            kind,
+            kwargs
+        )
+
+    def etag(request, **kwargs):
+        latest = get_latest_pub_date(kind, kwargs)
+        return md5(
+            f'{get_body_key(request, kwargs)}:{latest}'.encode()
+        ).hexdigest()
+
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, **kwargs):
+        key = get_body_key(request, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = feed(request, **kwargs)
+        cache.set(
+            key,
+            (response.content, response['Content-Type']),
+            settings.FEED_CACHE_TIMEOUT
+        )
+        return response
+
+    return view
+
+
+index_rss = cached_feed(IndexFeed(), 'index')
+index_atom = cached_feed(IndexAtomFeed(), 'index')
+group_rss = cached_feed(GroupFeed(), 'group')
+group_atom = cached_feed(GroupAtomFeed(), 'group')
+profile_rss = cached_feed(ProfileFeed(), 'profile')
+profile_atom = cached_feed(ProfileAtomFeed(), 'profile')
@@ -1,15 +1,60 @@
 from django import forms
 
-from .models import Comment, Post
+from core.uploads import RejectedUploadsMixin
 
+from .images import clear_image_metadata
+from .markup import prerender
+from .models import Comment, Group, Post, User
 
-class PostForm(forms.ModelForm):
+
+class PrerenderedTextForm(forms.ModelForm):
+    """Форма, которая сохраняет вместе с текстом его готовый HTML."""
+
+    def save(self, commit=True):
+        prerender(self.instance)
+        return super().save(commit)
+
+
+class PostForm(RejectedUploadsMixin, PrerenderedTextForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, rejected_uploads=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_uploads = rejected_uploads or {}
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            # Сведения о новой картинке соберёт process_image.
+            clear_image_metadata(self.instance)
+        return super().save(commit)
+
 
-class CommentForm(forms.ModelForm):
+class CommentForm(PrerenderedTextForm):
     class Meta:
         model = Comment
         fields = ('text', )
+
+
+class GroupReassignForm(forms.Form):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Новая группа',
+        help_text='Оставьте пустым, чтобы убрать посты из группы'
+    )
+
+
+class AuthorTransferForm(forms.Form):
+    username = forms.CharField(
+        label='Новый автор',
+        help_text='Имя пользователя, которому перейдут посты'
+    )
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise forms.ValidationError('Пользователь не найден')
@@ -0,0 +1,279 @@
+"""Проверка картинок постов, перцептивный хеш и хранилище по содержимому.
+
+dHash картинки - 64 бита: картинка сжимается до 9x8 в оттенках серого,
+и каждый бит говорит, светлее ли пиксель соседа справа. У пересжатых,
+уменьшенных или слегка подкрашенных копий хеши отличаются в нескольких
+битах, поэтому image_hash годится для поиска почти одинаковых картинок
+по расстоянию Хэмминга.
+
+В запросе картинка проверяется только по заголовку (core.uploads).
+Полное раскодирование, удаление EXIF, подсчёт dHash, размеров, основного
+цвета и заглушки выполняет process_image в пуле из IMAGE_WORKERS потоков
+после сохранения поста, так что одновременно раскодируется не больше
+IMAGE_WORKERS картинок. Пока картинка не обработана, image_width поста
+пуст. Шаблоны берут размеры и заглушку из полей поста и не открывают
+файл при отрисовке.
+"""
+import os
+import threading
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from sorl.thumbnail import delete
+
+from .models import Post
+from .utils import (bump_post_generations, get_post_pages,
+                    get_unreferenced_images, to_signed64)
+
+HASH_WIDTH = 8
+HASH_HEIGHT = 8
+EXIF_ORIENTATION = 0x0112
+
+EMPTY_METADATA = {
+    'image_hash': None,
+    'image_width': None,
+    'image_height': None,
+    'image_color': '',
+    'image_placeholder': '',
+}
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_dhash(image):
+    from PIL import Image
+
+    image = image.convert('L').resize(
+        (HASH_WIDTH + 1, HASH_HEIGHT), Image.BILINEAR
+    )
+    pixels = image.tobytes()
+    value = 0
+    for row in range(HASH_HEIGHT):
+        for column in range(HASH_WIDTH):
+            left = pixels[row * (HASH_WIDTH + 1) + column]
+            value = value << 1 | (left > pixels[
+                row * (HASH_WIDTH + 1) + column + 1
+            ])
+    return to_signed64(value)
+
+
+def get_image_hash(file):
+    """dHash картинки или None, если файл не читается как картинка."""
+    # Pillow не нужен при старте воркера, см. core.startup.DEFERRED_MODULES.
+    from PIL import Image
+
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            return get_dhash(image)
+    except (OSError, ValueError):
+        return None
+    finally:
+        file.seek(0)
+
+
+def orient(image):
+    """Картинка, повёрнутая по EXIF, или она же, если поворот не нужен."""
+    from PIL import ImageOps
+
+    if image.getexif().get(EXIF_ORIENTATION, 1) == 1:
+        return image
+    return ImageOps.exif_transpose(image)
+
+
+def strip_exif(image, oriented):
+    """Содержимое картинки без EXIF или None, если EXIF в ней нет.
+
+    Сохраняется уже повёрнутая картинка oriented, чтобы без EXIF она не
+    легла набок.
+    """
+    if not image.getexif() or getattr(image, 'n_frames', 1) > 1:
+        return None
+    options = {}
+    if oriented is image and image.format == 'JPEG':
+        # Без поворота JPEG пересохраняется с исходными таблицами
+        # квантования, почти без потерь.
+        options['quality'] = 'keep'
+    buffer = BytesIO()
+    oriented.save(buffer, image.format, **options)
+    return buffer.getvalue()
+
+
+def get_dominant_color(image):
+    """Самый частый цвет картинки, сведённой к палитре из 8 цветов."""
+    small = image.convert('RGB')
+    small.thumbnail((64, 64))
+    quantized = small.quantize(colors=8)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def get_placeholder(image):
+    """Размытая миниатюра картинки в data: URI для фона до загрузки."""
+    from PIL import ImageFilter
+
+    small = image.convert('RGB')
+    small.thumbnail(
+        (settings.IMAGE_PLACEHOLDER_SIZE, settings.IMAGE_PLACEHOLDER_SIZE)
+    )
+    buffer = BytesIO()
+    small.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, 'JPEG', quality=50
+    )
+    return 'data:image/jpeg;base64,' + b64encode(buffer.getvalue()).decode()
+
+
+def get_image_metadata(image):
+    """Значения полей IMAGE_METADATA_FIELDS для повёрнутой картинки."""
+    width, height = image.size
+    return {
+        'image_hash': get_dhash(image),
+        'image_width': width,
+        'image_height': height,
+        'image_color': get_dominant_color(image),
+        'image_placeholder': get_placeholder(image),
+    }
+
+
+def clear_image_metadata(post):
+    """Сбрасывает сведения о картинке, чтобы process_image собрал их
+    заново."""
+    for field, value in EMPTY_METADATA.items():
+        setattr(post, field, value)
+
+
+def reject_image(post_id, name):
+    Post.objects.filter(pk=post_id, image=name).update(
+        image='', **EMPTY_METADATA
+    )
+    for unreferenced in get_unreferenced_images([name]):
+        delete(unreferenced)
+    bump_post_generations(get_post_pages([post_id]))
+
+
+def get_upload_name(name):
+    """Имя для повторного сохранения файла: upload_to поля и имя файла.
+
+    Каталог хранимого файла в имя не попадает, каталог хеша добавит
+    хранилище.
+    """
+    field = Post._meta.get_field('image')
+    return field.generate_filename(None, os.path.basename(name))
+
+
+def process_image(post_id, name):
+    """Раскодирует картинку поста целиком, убирает EXIF и сохраняет в
+    посте её размеры, основной цвет, заглушку и dHash.
+
+    Картинку, которая не раскодируется или больше IMAGE_MAX_PIXELS,
+    пост теряет. Пропавший файл оставляется как есть.
+    """
+    from PIL import Image
+
+    storage = Post._meta.get_field('image').storage
+    try:
+        with storage.open(name) as file, Image.open(file) as image:
+            width, height = image.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise ValueError('Слишком много пикселей')
+            image.load()
+            oriented = orient(image)
+            metadata = get_image_metadata(oriented)
+            content = strip_exif(image, oriented)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        reject_image(post_id, name)
+        return
+    new_name = name
+    if content:
+        new_name = storage.save(get_upload_name(name), ContentFile(content))
+    Post.objects.filter(pk=post_id, image=name).update(
+        image=new_name, **metadata
+    )
+    if new_name != name:
+        for unreferenced in get_unreferenced_images([name]):
+            delete(unreferenced)
+    bump_post_generations(get_post_pages([post_id]))
+
+
+def process_chunk(pks):
+    """Задача для process_images: обрабатывает картинки пачки постов."""
+    posts = Post.objects.filter(pk__in=pks).values_list('pk', 'image')
+    for post_id, name in posts:
+        process_image(post_id, name)
+    return len(pks)
+
+
+def run_in_pool(post_id, name):
+    close_old_connections()
+    try:
+        process_image(post_id, name)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                settings.IMAGE_WORKERS, thread_name_prefix='images'
+            )
+        return executor
+
+
+def schedule_image_processing(post):
+    """Ставит картинку поста в очередь после фиксации транзакции.
+
+    При IMAGE_WORKERS = 0 картинка проверяется сразу, в текущем потоке.
+    """
+    post_id, name = post.pk, post.image.name
+    if not settings.IMAGE_WORKERS:
+        process_image(post_id, name)
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_pool, post_id, name)
+    )
+
+
+def get_undeduplicated_posts():
+    return Post.objects.exclude(image='').filter(
+        Q(image_hash__isnull=True) | ~Q(image__regex=r'/[0-9a-f]{64}\.')
+    )
+
+
+def dedupe_chunk(pks):
+    """Переносит картинки пачки постов в хранилище по содержимому.
+
+    Возвращает пару (обработано постов, не найдено файлов). Старый файл
+    удаляется, только когда на него больше не ссылается ни один пост.
+    """
+    storage = Post._meta.get_field('image').storage
+    moved = set()
+    missing = 0
+    for post in Post.objects.filter(pk__in=pks).only('image'):
+        name = post.image.name
+        if not storage.exists(name):
+            missing += 1
+            continue
+        with storage.open(name) as file:
+            new_name = storage.save(get_upload_name(name), file)
+            image_hash = get_image_hash(file)
+        # update() без сигналов: содержимое картинки не меняется.
+        Post.objects.filter(pk=post.pk).update(
+            image=new_name, image_hash=image_hash
+        )
+        if new_name != name:
+            moved.add(name)
+    for name in get_unreferenced_images(moved):
+        delete(name)
+    bump_post_generations(get_post_pages(pks))
+    return len(pks), missing
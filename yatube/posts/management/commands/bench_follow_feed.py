@@ -0,0 +1,103 @@
+import time
+from statistics import mean
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Follow, Post, User
+from posts.timeline import STRATEGIES, get_follow_page, push_post
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает стратегии построения ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Чью ленту строить')
+        parser.add_argument(
+            '--strategy',
+            action='append',
+            choices=sorted(STRATEGIES),
+            help='Стратегии для сравнения, по умолчанию все'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=3,
+            help='Сколько страниц ленты пройти подряд'
+        )
+        parser.add_argument(
+            '--writes',
+            action='store_true',
+            help='Замерить и стоимость раскладки постов при записи'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Сколько раз повторить замер'
+        )
+
+    def walk_pages(self, user, strategy, pages):
+        params = {}
+        for number in range(1, pages + 1):
+            page = get_follow_page(user, params, strategy)
+            list(page.object_list)
+            if not page.has_next():
+                return
+            if hasattr(page, 'next_cursor'):
+                params = {'after': page.next_cursor}
+            else:
+                params = {'page': number + 1}
+
+    def measure_writes(self, user):
+        """Раскладывает последний пост каждого автора из подписок
+        и откатывает транзакцию, чтобы не менять данные.
+        """
+        inserted = []
+        timings = []
+        for author_id in Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        ):
+            post = Post.objects.filter(author_id=author_id).first()
+            if post is None:
+                continue
+            with transaction.atomic():
+                start = time.perf_counter()
+                inserted.append(push_post(post))
+                timings.append(time.perf_counter() - start)
+                transaction.set_rollback(True)
+        if not inserted:
+            self.stdout.write('Запись: у авторов из подписок нет постов')
+            return
+        pulled = sum(1 for count in inserted if count == 0)
+        self.stdout.write(
+            f'Запись: в среднем {mean(inserted):.0f} строк ленты '
+            f'и {mean(timings) * 1000:.1f} мс на пост, '
+            f'максимум {max(inserted)} строк; '
+            f'авторов без раскладки (порог '
+            f'{settings.FEED_PUSH_MAX_FOLLOWERS}): {pulled}'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+        following = Follow.objects.filter(user=user).count()
+        self.stdout.write(f'Подписок у {user.username}: {following}')
+        for strategy in options['strategy'] or sorted(STRATEGIES):
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    self.walk_pages(user, strategy, options['pages'])
+                    timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{strategy}: в среднем {mean(timings) * 1000:.1f} мс, '
+                f'лучшее {min(timings) * 1000:.1f} мс, '
+                f'запросов {len(queries.captured_queries)}'
+            )
+        if options['writes']:
+            self.measure_writes(user)
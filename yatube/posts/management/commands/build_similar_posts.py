@@ -0,0 +1,56 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.similarity import index_chunk
+from posts.utils import iter_pk_chunks
+
+
+class Command(BaseCommand):
+    help = 'Заполняет корзины LSH для поиска похожих постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за одну транзакцию'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов считают подписи параллельно'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать все посты, а не только без корзин'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(buckets__isnull=True)
+        chunks = iter_pk_chunks(queryset, options['batch_size'])
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                options['workers'],
+                mp_context=get_context('spawn'),
+                initializer=django.setup
+            )
+            with executor:
+                results = executor.map(index_chunk, chunks)
+                self.report(results)
+        else:
+            self.report(map(index_chunk, chunks))
+
+    def report(self, results):
+        total = 0
+        for processed in results:
+            total += processed
+            self.stdout.write(f'Обработано постов: {total}')
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает устаревшие файлы карты сайта и её индекс'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить все файлы, а не только устаревшие'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = build_sitemaps(options['all'], options['chunk_size'])
+        for name in rebuilt:
+            self.stdout.write(name)
+        self.stdout.write(f'Перестроено файлов: {len(rebuilt)}')
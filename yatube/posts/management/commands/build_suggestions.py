@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import build_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок по общим подпискам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько пользователей обрабатывать за одну транзакцию'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_COUNT,
+            help='Сколько рекомендаций хранить на пользователя'
+        )
+        parser.add_argument(
+            '--fanout',
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_MAX_FANOUT,
+            help='Предел длины списка подписок и подписчиков при обходе'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for processed in build_suggestions(
+            options['batch_size'], options['count'], options['fanout']
+        ):
+            total += processed
+            self.stdout.write(f'Обработано пользователей: {total}')
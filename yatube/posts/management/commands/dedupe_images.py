@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.images import dedupe_chunk, get_undeduplicated_posts
+from posts.utils import bump_cache_generation, iter_pk_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище по содержимому '
+        'и считает их перцептивные хеши'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за одну задачу'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов переносят картинки параллельно'
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_pk_chunks(
+            get_undeduplicated_posts(), options['batch_size']
+        )
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                options['workers'],
+                mp_context=get_context('spawn'),
+                initializer=django.setup
+            )
+            with executor:
+                self.report(executor.map(dedupe_chunk, chunks))
+        else:
+            self.report(map(dedupe_chunk, chunks))
+        # Посты обновлялись через update(), без сигналов.
+        for name in ('group_index', 'feeds'):
+            bump_cache_generation(name)
+
+    def report(self, results):
+        total = missing = 0
+        for processed, not_found in results:
+            total += processed
+            missing += not_found
+            self.stdout.write(
+                f'Обработано постов: {total}, файлов не найдено: {missing}'
+            )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow
+from posts.timeline import push_author_posts
+from posts.utils import iter_pk_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает последние посты авторов по лентам подписчиков '
+        'для стратегии hybrid'
+    )
+
+    def handle(self, *args, **options):
+        total = 0
+        for chunk in iter_pk_chunks(
+            Follow.objects.all(), settings.BULK_CHUNK_SIZE
+        ):
+            for user_id, author_id in Follow.objects.filter(
+                pk__in=chunk
+            ).values_list('user_id', 'author_id'):
+                push_author_posts(user_id, author_id)
+            total += len(chunk)
+        self.stdout.write(f'Обработано подписок: {total}')
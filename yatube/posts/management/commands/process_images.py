@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.images import process_chunk
+from posts.models import Post
+from posts.utils import iter_pk_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры, основной цвет и заглушки картинок постов, '
+        'которые ещё не обработаны'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за одну задачу'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов раскодируют картинки параллельно'
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_pk_chunks(
+            Post.objects.exclude(image='').filter(image_width__isnull=True),
+            options['batch_size']
+        )
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                options['workers'],
+                mp_context=get_context('spawn'),
+                initializer=django.setup
+            )
+            with executor:
+                self.report(executor.map(process_chunk, chunks))
+        else:
+            self.report(map(process_chunk, chunks))
+
+    def report(self, results):
+        total = 0
+        for processed in results:
+            total += processed
+            self.stdout.write(f'Обработано постов: {total}')
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.markup import find_mentions, prerender
+from posts.models import Comment, Post, User
+from posts.utils import iter_pk_chunks
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML текстов постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько записей обновлять одним запросом'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перерисовать все записи, а не только незаполненные'
+        )
+
+    def render_model(self, model, fields, batch_size, render_all):
+        queryset = model.objects.all()
+        if not render_all:
+            queryset = queryset.filter(text_html='')
+        total = 0
+        for chunk in iter_pk_chunks(queryset, batch_size):
+            objects = list(model.objects.filter(pk__in=chunk).only('text'))
+            mentions = set()
+            for obj in objects:
+                mentions |= find_mentions(obj.text)
+            usernames = set(User.objects.filter(
+                username__in=mentions
+            ).values_list('username', flat=True))
+            for obj in objects:
+                prerender(obj, usernames)
+            model.objects.bulk_update(objects, fields)
+            total += len(objects)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: обновлено {total}'
+        )
+
+    def handle(self, *args, **options):
+        self.render_model(
+            Post, ('text_html', 'excerpt'),
+            options['batch_size'], options['all']
+        )
+        self.render_model(
+            Comment, ('text_html',),
+            options['batch_size'], options['all']
+        )
@@ -0,0 +1,54 @@
+import re
+
+from django.urls import reverse
+from django.utils.html import escape, linebreaks, urlize
+from django.utils.text import Truncator
+
+from .models import User
+
+EXCERPT_WORDS = 30
+MENTION_RE = re.compile(r'(?<![\w@/])@(\w[\w.+-]*\w|\w)')
+# Ссылка, которую сделал urlize: упоминания внутри неё не заменяются.
+LINK_RE = re.compile(r'(<a\s[^>]*>.*?</a>)', re.S)
+
+
+def find_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def render_text(text, usernames=None):
+    """Готовит HTML текста: экранирование, ссылки, @упоминания, абзацы.
+
+    usernames - уже известные существующие имена из find_mentions;
+    если не переданы, они проверяются отдельным запросом.
+    """
+    mentions = find_mentions(text)
+    if usernames is None:
+        usernames = set(User.objects.filter(
+            username__in=mentions
+        ).values_list('username', flat=True)) if mentions else set()
+
+    def mention_link(match):
+        username = match.group(1)
+        if username not in usernames:
+            return match.group(0)
+        return '<a href="{}">@{}</a>'.format(
+            escape(reverse('posts:profile', args=(username,))),
+            escape(username)
+        )
+
+    parts = LINK_RE.split(urlize(text, nofollow=True, autoescape=True))
+    # Нечётные части - ссылки, чётные - экранированный текст между ними.
+    parts[::2] = [MENTION_RE.sub(mention_link, part) for part in parts[::2]]
+    return linebreaks(''.join(parts))
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS)
+
+
+def prerender(instance, usernames=None):
+    """Заполняет сохраняемые HTML-поля поста или комментария."""
+    instance.text_html = render_text(instance.text, usernames)
+    if hasattr(instance, 'excerpt'):
+        instance.excerpt = make_excerpt(instance.text)
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:11
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_archive_months(apps, schema_editor):
+    ArchiveMonth = apps.get_model('posts', 'ArchiveMonth')
+    Post = apps.get_model('posts', 'Post')
+    months = Post.objects.annotate(
+        year=ExtractYear('pub_date'),
+        month=ExtractMonth('pub_date'),
+    ).order_by().values('year', 'month').annotate(posts_count=Count('pk'))
+    ArchiveMonth.objects.bulk_create(
+        ArchiveMonth(**month) for month in months
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+            ],
+            options={
+                'verbose_name': 'Месяц архива',
+                'verbose_name_plural': 'Месяцы архива',
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_archive_month'),
+        ),
+        migrations.RunPython(
+            fill_archive_months, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_archivemonth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=20, verbose_name='Раздел')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('dirty', models.BooleanField(default=True, verbose_name='Устарел')),
+                ('urls_count', models.PositiveIntegerField(default=0, verbose_name='Адресов')),
+                ('lastmod', models.DateTimeField(blank=True, null=True, verbose_name='Последнее изменение')),
+                ('generated', models.DateTimeField(blank=True, null=True, verbose_name='Дата генерации')),
+            ],
+            options={
+                'verbose_name': 'Файл карты сайта',
+                'verbose_name_plural': 'Файлы карты сайта',
+                'ordering': ('section', 'number'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sitemapshard',
+            constraint=models.UniqueConstraint(fields=('section', 'number'), name='unique_sitemap_shard'),
+        ),
+    ]
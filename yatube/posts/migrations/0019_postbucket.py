@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='Хеш полосы')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Корзина похожих постов',
+                'verbose_name_plural': 'Корзины похожих постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postbucket',
+            index=models.Index(fields=['band', 'bucket'], name='post_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postbucket',
+            constraint=models.UniqueConstraint(fields=('post', 'band'), name='unique_post_bucket'),
+        ),
+    ]
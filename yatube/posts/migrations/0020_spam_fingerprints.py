@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_postbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarantinedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Текст поста')),
+                ('image', models.ImageField(blank=True, upload_to='posts/', verbose_name='Картинка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('copies', models.PositiveIntegerField(verbose_name='Похожих постов')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Пост в карантине',
+                'verbose_name_plural': 'Посты в карантине',
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PostFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('simhash', models.BigIntegerField(verbose_name='SimHash')),
+                ('band0', models.PositiveIntegerField()),
+                ('band1', models.PositiveIntegerField()),
+                ('band2', models.PositiveIntegerField()),
+                ('band3', models.PositiveIntegerField()),
+                ('created', models.DateTimeField(db_index=True, verbose_name='Дата создания')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток поста',
+                'verbose_name_plural': 'Отпечатки постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postfingerprint',
+            index=models.Index(fields=['band0', 'created'], name='post_fingerprint_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postfingerprint',
+            index=models.Index(fields=['band1', 'created'], name='post_fingerprint_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postfingerprint',
+            index=models.Index(fields=['band2', 'created'], name='post_fingerprint_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postfingerprint',
+            index=models.Index(fields=['band3', 'created'], name='post_fingerprint_band3_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:33
+
+import core.storage
+import core.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', validators=[core.uploads.validate_image_pixels], verbose_name='Картинка'),
+        ),
+    ]
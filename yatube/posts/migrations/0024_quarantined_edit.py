@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quarantinedpost',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Исправляемый пост'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_quarantined_image_pixels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postfingerprint',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Пост'),
+        ),
+    ]
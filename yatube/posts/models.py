@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+from core.uploads import validate_image_pixels
+
 User = get_user_model()
 
 
@@ -23,9 +26,21 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        verbose_name='Текст поста в HTML',
+        blank=True,
+        editable=False
+    )
+    excerpt = models.CharField(
+        verbose_name='Начало текста',
+        max_length=300,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     group = models.ForeignKey(
         Group,
@@ -45,13 +60,62 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        validators=[validate_image_pixels],
         blank=True
     )
+    image_hash = models.BigIntegerField(
+        verbose_name='Перцептивный хеш картинки',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True
+    )
+    image_width = models.PositiveIntegerField(
+        verbose_name='Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        verbose_name='Высота картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_color = models.CharField(
+        verbose_name='Основной цвет картинки',
+        max_length=7,
+        blank=True,
+        editable=False
+    )
+    image_placeholder = models.TextField(
+        verbose_name='Заглушка картинки',
+        blank=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        verbose_name='Дата последнего комментария',
+        blank=True,
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -74,9 +138,15 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Введите текст комментария'
     )
+    text_html = models.TextField(
+        verbose_name='Текст комментария в HTML',
+        blank=True,
+        editable=False
+    )
     created = models.DateTimeField(
         verbose_name='Дата комментария',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
 
     class Meta:
@@ -113,3 +183,272 @@ class Follow(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} подписан на {self.author}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_entry_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post} в ленте {self.user}'
+
+
+class ArchiveMonth(models.Model):
+    """Число постов за месяц для архива.
+
+    Обновляется сигналами при создании и удалении постов, чтобы архив
+    не считал посты GROUP BY по всей таблице.
+    """
+
+    year = models.PositiveSmallIntegerField(verbose_name='Год')
+    month = models.PositiveSmallIntegerField(verbose_name='Месяц')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов',
+        default=0
+    )
+
+    class Meta:
+        ordering = ('-year', '-month')
+        verbose_name = 'Месяц архива'
+        verbose_name_plural = 'Месяцы архива'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['year', 'month'],
+                name='unique_archive_month'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.month:02}.{self.year}: {self.posts_count}'
+
+
+class SitemapShard(models.Model):
+    """Файл карты сайта с диапазоном первичных ключей одного раздела.
+
+    Сигналы помечают файл устаревшим при создании и удалении объектов
+    из его диапазона, и генератор перестраивает только такие файлы.
+    """
+
+    section = models.CharField(verbose_name='Раздел', max_length=20)
+    number = models.PositiveIntegerField(verbose_name='Номер')
+    dirty = models.BooleanField(verbose_name='Устарел', default=True)
+    urls_count = models.PositiveIntegerField(
+        verbose_name='Адресов',
+        default=0
+    )
+    lastmod = models.DateTimeField(
+        verbose_name='Последнее изменение',
+        null=True,
+        blank=True
+    )
+    generated = models.DateTimeField(
+        verbose_name='Дата генерации',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('section', 'number')
+        verbose_name = 'Файл карты сайта'
+        verbose_name_plural = 'Файлы карты сайта'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['section', 'number'],
+                name='unique_sitemap_shard'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'sitemap-{self.section}-{self.number}.xml'
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться, по расчёту build_suggestions."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='follow_suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    score = models.PositiveIntegerField(verbose_name='Общих подписок')
+
+    class Meta:
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'],
+                name='follow_suggestion_rank_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.author} для {self.user}'
+
+
+class PostBucket(models.Model):
+    """Корзина LSH: полоса MinHash-подписи текста поста."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='buckets'
+    )
+    band = models.PositiveSmallIntegerField(verbose_name='Полоса')
+    bucket = models.BigIntegerField(verbose_name='Хеш полосы')
+
+    class Meta:
+        verbose_name = 'Корзина похожих постов'
+        verbose_name_plural = 'Корзины похожих постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'band'],
+                name='unique_post_bucket'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket'],
+                name='post_bucket_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.band}/{self.bucket}'
+
+
+class PostFingerprint(models.Model):
+    """SimHash поста с полосами для поиска почти одинаковых.
+
+    У опубликованного поста один отпечаток: правка заменяет его.
+    """
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name='Пост',
+        related_name='+'
+    )
+    simhash = models.BigIntegerField(verbose_name='SimHash')
+    band0 = models.PositiveIntegerField()
+    band1 = models.PositiveIntegerField()
+    band2 = models.PositiveIntegerField()
+    band3 = models.PositiveIntegerField()
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Отпечаток поста'
+        verbose_name_plural = 'Отпечатки постов'
+        indexes = [
+            models.Index(
+                fields=[f'band{band}', 'created'],
+                name=f'post_fingerprint_band{band}_idx'
+            )
+            for band in range(4)
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.simhash & 0xFFFFFFFFFFFFFFFF:016x}'
+
+
+class QuarantinedPost(models.Model):
+    """Пост, похожий на волну спама, ожидающий решения модератора."""
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    text = models.TextField(verbose_name='Текст поста')
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        validators=[validate_image_pixels],
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    copies = models.PositiveIntegerField(verbose_name='Похожих постов')
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Исправляемый пост'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Пост в карантине'
+        verbose_name_plural = 'Посты в карантине'
+
+    def __str__(self) -> str:
+        return self.text[:15]
@@ -0,0 +1,196 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .images import schedule_image_processing
+from .models import (ArchiveMonth, Comment, Follow, Group, Post,
+                     PostFingerprint, User)
+from .similarity import index_posts
+from .sitemaps import mark_dirty
+from .timeline import (push_author_posts, push_enabled, push_post,
+                       remove_author_posts)
+from .utils import (bump_cache_generation, bump_post_generations,
+                    recount_comments)
+
+SITEMAP_SECTIONS = {Group: 'groups', User: 'profiles', Post: 'posts'}
+# Поля, от которых зависит адрес объекта или его место в карте сайта.
+SITEMAP_FIELDS = {Group: ('slug',), User: ('username', 'is_active')}
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_group_index(sender, **kwargs):
+    bump_cache_generation('group_index')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feeds(sender, **kwargs):
+    bump_cache_generation('feeds')
+
+
+@receiver(pre_save, sender=Post)
+def remember_stored_post(sender, instance, raw=False, **kwargs):
+    # Прежние автор, группа и текст: по ним видно, что изменил save().
+    instance._stored_post = None
+    if not raw and instance.pk is not None:
+        instance._stored_post = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('author_id', 'group_id', 'text').first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    posts = [(instance.pk, instance.author_id, instance.group_id)]
+    stored = getattr(instance, '_stored_post', None)
+    if stored is not None:
+        # Пост мог уйти из группы или к другому автору.
+        posts.append((instance.pk, *stored[:2]))
+    bump_post_generations(posts)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    bump_post_generations(Post.objects.filter(
+        pk=instance.post_id
+    ).values_list('pk', 'author_id', 'group_id'))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    bump_cache_generation(f'group:{instance.pk}')
+    bump_cache_generation('pages')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_viewer_pages(sender, instance, **kwargs):
+    bump_cache_generation(f'viewer:{instance.user_id}')
+
+
+@receiver(post_save, sender=Post)
+def count_archive_post(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    pub_date = timezone.localtime(instance.pub_date)
+    month, _ = ArchiveMonth.objects.get_or_create(
+        year=pub_date.year, month=pub_date.month
+    )
+    ArchiveMonth.objects.filter(pk=month.pk).update(
+        posts_count=F('posts_count') + 1
+    )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_archive_post(sender, instance, **kwargs):
+    pub_date = timezone.localtime(instance.pub_date)
+    ArchiveMonth.objects.filter(
+        year=pub_date.year, month=pub_date.month, posts_count__gt=0
+    ).update(posts_count=F('posts_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=F('comments_count') + 1,
+        last_comment_at=instance.created,
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    recount_comments(instance.post_id)
+
+
+def get_sitemap_values(instance):
+    return tuple(
+        getattr(instance, field)
+        for field in SITEMAP_FIELDS.get(type(instance), ())
+    )
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def remember_sitemap_values(sender, instance, raw=False, update_fields=None,
+                            **kwargs):
+    fields = SITEMAP_FIELDS[sender]
+    instance._sitemap_values = None
+    if raw or instance.pk is None or (
+        update_fields is not None and not set(fields) & set(update_fields)
+    ):
+        return
+    instance._sitemap_values = sender.objects.filter(
+        pk=instance.pk
+    ).values_list(*fields).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Post)
+def mark_sitemap_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_sitemap_values', None)
+    if created or stored not in (None, get_sitemap_values(instance)):
+        mark_dirty(SITEMAP_SECTIONS[sender], instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Post)
+def mark_sitemap_deleted(sender, instance, **kwargs):
+    mark_dirty(SITEMAP_SECTIONS[sender], instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_similar_post(sender, instance, created, raw=False,
+                       update_fields=None, **kwargs):
+    if raw or update_fields is not None and 'text' not in update_fields:
+        return
+    stored = getattr(instance, '_stored_post', None)
+    if not created and stored is not None and stored[2] == instance.text:
+        return
+    index_posts([instance])
+
+
+@receiver(post_save, sender=Post)
+def link_post_fingerprint(sender, instance, created, raw=False, **kwargs):
+    fingerprint = getattr(instance, '_fingerprint', None)
+    if created and not raw and fingerprint is not None:
+        PostFingerprint.objects.filter(pk=fingerprint.pk).update(
+            post=instance
+        )
+
+
+@receiver(post_save, sender=Post)
+def check_post_image(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image and instance.image_width is None:
+        schedule_image_processing(instance)
+
+
+@receiver(post_save, sender=Post)
+def push_created_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and push_enabled():
+        push_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def push_followed_posts(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and push_enabled():
+        push_author_posts(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_followed_posts(sender, instance, **kwargs):
+    if push_enabled():
+        remove_author_posts(instance.user_id, instance.author_id)
@@ -0,0 +1,123 @@
+"""Похожие посты через MinHash и LSH.
+
+MinHash-подпись текста - минимумы MINHASH_PERMUTATIONS хеш-функций по
+множеству шинглов (подстрок из MINHASH_SHINGLE_SIZE символов). Доля
+совпавших значений в подписях двух текстов оценивает коэффициент Жаккара
+их шинглов. Подпись режется на MINHASH_BANDS полос, хеш каждой полосы
+хранится в PostBucket: посты хотя бы с одной общей корзиной становятся
+кандидатами, и поиск похожих - это запрос по индексу (band, bucket)
+вместо сравнения текста со всеми постами.
+"""
+import random
+import re
+import struct
+from functools import lru_cache, reduce
+from hashlib import blake2b
+from operator import or_
+from zlib import crc32
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Post, PostBucket
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Коэффициенты перестановок должны совпадать во всех процессах и между
+# запусками, иначе корзины старых и новых постов не пересекутся.
+PERMUTATIONS_SEED = 1
+
+WORD_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=None)
+def get_permutations(count):
+    """Коэффициенты (a, b) хеш-функций вида (a * x + b) mod p."""
+    rng = random.Random(PERMUTATIONS_SEED)
+    return tuple(
+        (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+        for _ in range(count)
+    )
+
+
+def get_shingles(text, size):
+    """Подстроки длины size текста без регистра, пунктуации и лишних
+    пробелов."""
+    normalized = ' '.join(WORD_RE.findall(text.lower()))
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {
+        normalized[i:i + size] for i in range(len(normalized) - size + 1)
+    }
+
+
+def get_signature(text):
+    """MinHash-подпись текста или пустой список для текста без слов."""
+    hashes = [
+        crc32(shingle.encode())
+        for shingle in get_shingles(text, settings.MINHASH_SHINGLE_SIZE)
+    ]
+    if not hashes:
+        return []
+    return [
+        min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in hashes)
+        for a, b in get_permutations(settings.MINHASH_PERMUTATIONS)
+    ]
+
+
+def get_buckets(text):
+    """Пары (полоса, хеш полосы) для подписи текста."""
+    signature = get_signature(text)
+    if not signature:
+        return []
+    rows = len(signature) // settings.MINHASH_BANDS
+    return [
+        (band, int.from_bytes(blake2b(
+            struct.pack(f'<{rows}I', *signature[start:start + rows]),
+            digest_size=8
+        ).digest(), 'big', signed=True))
+        for band, start in enumerate(range(0, rows * settings.MINHASH_BANDS,
+                                           rows))
+    ]
+
+
+def index_posts(posts):
+    """Пересчитывает корзины постов, возвращает число постов."""
+    posts = list(posts)
+    rows = [
+        PostBucket(post_id=post.pk, band=band, bucket=bucket)
+        for post in posts
+        for band, bucket in get_buckets(post.text)
+    ]
+    with transaction.atomic():
+        PostBucket.objects.filter(post__in=posts).delete()
+        PostBucket.objects.bulk_create(rows)
+    return len(posts)
+
+
+def index_chunk(pks):
+    """Задача для build_similar_posts: корзины пачки постов по ключам."""
+    return index_posts(Post.objects.filter(pk__in=pks).only('text'))
+
+
+def get_similar_posts(post, count=None):
+    """Посты с наибольшим числом общих корзин.
+
+    Три запроса: корзины поста, кандидаты по индексу (band, bucket) и
+    сами посты.
+    """
+    count = count or settings.SIMILAR_POSTS_COUNT
+    buckets = PostBucket.objects.filter(post=post).values_list(
+        'band', 'bucket'
+    )
+    conditions = [Q(band=band, bucket=bucket) for band, bucket in buckets]
+    if not conditions:
+        return []
+    candidates = list(PostBucket.objects.filter(
+        reduce(or_, conditions)
+    ).exclude(post=post).values('post').annotate(
+        shared=Count('pk')
+    ).order_by('-shared', '-post').values_list('post', flat=True)[:count])
+    posts = Post.objects.select_related('author').in_bulk(candidates)
+    return [posts[pk] for pk in candidates if pk in posts]
@@ -0,0 +1,217 @@
+"""Карта сайта, которая пишется на диск по частям.
+
+Объекты каждого раздела делятся на файлы по диапазонам первичных ключей
+размером SITEMAP_SHARD_SIZE, поэтому в файле не больше 50 000 адресов,
+а новые посты попадают только в последний файл. Строки читаются через
+iterator() пачками и сразу пишутся в файл, в памяти весь раздел не
+собирается. Перестраиваются только файлы, помеченные сигналами как
+устаревшие, и файлы, которых нет на диске.
+"""
+import os
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Group, Post, SitemapShard, User
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<{tag} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+# Заглушки, вместо которых в адрес подставляется ключ объекта: reverse()
+# на каждую строку заметно дороже форматирования строки.
+PLACEHOLDER = 'sitemap-placeholder'
+NUMERIC_PLACEHOLDER = 918273645
+
+
+def get_shard_name(section, number):
+    return f'sitemap-{section}-{number}.xml'
+
+
+def get_shard_path(section, number):
+    return os.path.join(
+        settings.SITEMAP_ROOT, get_shard_name(section, number)
+    )
+
+
+def absolute(path):
+    return settings.SITEMAP_BASE_URL.rstrip('/') + path
+
+
+def format_url(location, lastmod=None):
+    lines = [f'  <url><loc>{escape(absolute(location))}</loc>']
+    if lastmod is not None:
+        lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    lines.append('</url>\n')
+    return ''.join(lines)
+
+
+def get_path_template(view_name, numeric=False):
+    placeholder = NUMERIC_PLACEHOLDER if numeric else PLACEHOLDER
+    path = reverse(view_name, args=(placeholder,))
+    return path.replace(str(placeholder), '{}')
+
+
+class ModelSection:
+    """Раздел карты сайта из адресов объектов одной модели."""
+
+    def __init__(self, name, model, view_name, field, lastmod_field=None,
+                 filters=None):
+        self.name = name
+        self.model = model
+        self.view_name = view_name
+        self.field = field
+        self.lastmod_field = lastmod_field
+        self.filters = filters or {}
+
+    def get_shards_count(self):
+        max_pk = self.model.objects.aggregate(max_pk=Max('pk'))['max_pk']
+        if max_pk is None:
+            return 0
+        return max_pk // settings.SITEMAP_SHARD_SIZE + 1
+
+    def get_urls(self, number, chunk_size):
+        size = settings.SITEMAP_SHARD_SIZE
+        fields = [self.field]
+        if self.lastmod_field:
+            fields.append(self.lastmod_field)
+        rows = self.model.objects.filter(
+            pk__gte=number * size, pk__lt=(number + 1) * size,
+            **self.filters
+        ).order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+        template = get_path_template(self.view_name, self.field == 'pk')
+        for row in rows:
+            yield (
+                template.format(quote(str(row[0]))),
+                row[1] if self.lastmod_field else None,
+            )
+
+
+class PagesSection:
+    """Постоянные страницы сайта, всегда один файл."""
+
+    name = 'pages'
+    view_names = (
+        'posts:index',
+        'posts:group_index',
+        'posts:archive',
+        'about:author',
+        'about:tech',
+    )
+
+    def get_shards_count(self):
+        return 1
+
+    def get_urls(self, number, chunk_size):
+        for view_name in self.view_names:
+            yield reverse(view_name), None
+
+
+SECTIONS = {
+    section.name: section for section in (
+        PagesSection(),
+        ModelSection('groups', Group, 'posts:group_list', 'slug'),
+        ModelSection(
+            'profiles', User, 'posts:profile', 'username',
+            filters={'is_active': True}
+        ),
+        ModelSection('posts', Post, 'posts:post_detail', 'pk', 'pub_date'),
+    )
+}
+
+
+def mark_dirty(section, pk):
+    """Помечает устаревшим файл, в диапазон которого попадает pk."""
+    number = pk // settings.SITEMAP_SHARD_SIZE
+    updated = SitemapShard.objects.filter(
+        section=section, number=number
+    ).update(dirty=True)
+    if not updated:
+        SitemapShard.objects.get_or_create(section=section, number=number)
+
+
+def write_shard(section, shard, chunk_size):
+    # Флаг снимается до чтения строк: пометка, сделанная во время
+    # генерации, перестроит файл в следующий раз.
+    SitemapShard.objects.filter(pk=shard.pk).update(dirty=False)
+    path = get_shard_path(section.name, shard.number)
+    temp_path = f'{path}.tmp'
+    urls_count = 0
+    lastmod = None
+    with open(temp_path, 'w', encoding='utf-8') as sitemap:
+        sitemap.write(HEADER.format(tag='urlset'))
+        for location, modified in section.get_urls(shard.number, chunk_size):
+            sitemap.write(format_url(location, modified))
+            urls_count += 1
+            if modified is not None:
+                lastmod = max(lastmod or modified, modified)
+        sitemap.write('</urlset>\n')
+    os.replace(temp_path, path)
+    SitemapShard.objects.filter(pk=shard.pk).update(
+        urls_count=urls_count, lastmod=lastmod, generated=timezone.now()
+    )
+
+
+def remove_shards(shards):
+    for shard in shards:
+        try:
+            os.remove(get_shard_path(shard.section, shard.number))
+        except FileNotFoundError:
+            pass
+        shard.delete()
+
+
+def write_index():
+    path = os.path.join(settings.SITEMAP_ROOT, 'sitemap.xml')
+    temp_path = f'{path}.tmp'
+    shards = SitemapShard.objects.filter(
+        section__in=SECTIONS, urls_count__gt=0
+    ).iterator()
+    with open(temp_path, 'w', encoding='utf-8') as index:
+        index.write(HEADER.format(tag='sitemapindex'))
+        for shard in shards:
+            location = reverse(
+                'posts:sitemap_shard', args=(shard.section, shard.number)
+            )
+            lastmod = shard.lastmod or shard.generated
+            index.write(
+                f'  <sitemap><loc>{escape(absolute(location))}</loc>'
+                f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+                '</sitemap>\n'
+            )
+        index.write('</sitemapindex>\n')
+    os.replace(temp_path, path)
+
+
+def build_sitemaps(rebuild_all=False, chunk_size=None):
+    """Перестраивает устаревшие файлы и индекс, возвращает их имена."""
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    rebuilt = []
+    for section in SECTIONS.values():
+        count = section.get_shards_count()
+        shards = {
+            shard.number: shard
+            for shard in SitemapShard.objects.filter(section=section.name)
+        }
+        remove_shards(
+            shard for number, shard in shards.items() if number >= count
+        )
+        for number in range(count):
+            shard = shards.get(number)
+            if shard is None:
+                shard = SitemapShard.objects.create(
+                    section=section.name, number=number
+                )
+            elif not (rebuild_all or shard.dirty or not os.path.exists(
+                get_shard_path(section.name, number)
+            )):
+                continue
+            write_shard(section, shard, chunk_size)
+            rebuilt.append(get_shard_name(section.name, number))
+    write_index()
+    return rebuilt
@@ -0,0 +1,126 @@
+"""Поиск почти одинаковых постов по SimHash.
+
+SimHash текста - 64 бита, каждый из которых равен знаку суммы
+соответствующих битов хешей шинглов. У почти одинаковых текстов
+отпечатки отличаются в нескольких битах. Отпечаток режется на
+SIMHASH_BANDS равных полос: если два отпечатка отличаются не больше чем
+в SPAM_MAX_DISTANCE < SIMHASH_BANDS битах, хотя бы одна полоса у них
+совпадает. Поэтому кандидаты ищутся по индексам полос среди отпечатков
+за SPAM_WINDOW секунд, а расстояние Хэмминга проверяется только у них.
+
+Отпечаток опубликованного поста один: правка заменяет его, а не
+добавляет новый, и собственные отпечатки поста при проверке правки не
+считаются. Иначе автор, несколько раз поправивший свой пост, сам
+набирал бы копии.
+
+Тексты короче SPAM_MIN_WORDS слов не проверяются: короткие ответы вроде
+«Спасибо!» у разных авторов совпадают сами по себе.
+"""
+from datetime import timedelta
+from functools import reduce
+from hashlib import blake2b
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PostFingerprint, QuarantinedPost
+from .similarity import WORD_RE, get_shingles
+from .utils import to_signed64
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def get_simhash(text):
+    """64-битный SimHash шинглов текста."""
+    weights = [0] * SIMHASH_BITS
+    for shingle in get_shingles(text, settings.SPAM_SHINGLE_SIZE):
+        value = int.from_bytes(
+            blake2b(shingle.encode(), digest_size=8).digest(), 'big'
+        )
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def get_bands(simhash):
+    return [
+        simhash >> (band * BAND_BITS) & BAND_MASK
+        for band in range(SIMHASH_BANDS)
+    ]
+
+
+def get_distance(first, second):
+    return bin(first ^ second).count('1')
+
+
+def count_copies(simhash, post=None):
+    """Сколько свежих отпечатков других постов отличаются от simhash не
+    больше чем в SPAM_MAX_DISTANCE битах."""
+    since = timezone.now() - timedelta(seconds=settings.SPAM_WINDOW)
+    lookup = reduce(or_, (
+        Q(**{f'band{band}': value})
+        for band, value in enumerate(get_bands(simhash))
+    ))
+    candidates = PostFingerprint.objects.filter(lookup, created__gte=since)
+    if post is not None and post.pk:
+        candidates = candidates.exclude(post=post)
+    candidates = candidates.values_list('simhash', flat=True)
+    return sum(
+        get_distance(simhash, candidate % (1 << SIMHASH_BITS))
+        <= settings.SPAM_MAX_DISTANCE
+        for candidate in candidates
+    )
+
+
+def remember(simhash, post):
+    """Сохраняет отпечаток поста и удаляет вышедшие из окна.
+
+    Прежний отпечаток правленого поста удаляется. Отпечаток нового поста
+    связывает с ним сигнал после сохранения.
+    """
+    now = timezone.now()
+    PostFingerprint.objects.filter(
+        created__lt=now - timedelta(seconds=settings.SPAM_WINDOW)
+    ).delete()
+    if post.pk:
+        PostFingerprint.objects.filter(post=post).delete()
+    return PostFingerprint.objects.create(
+        author=post.author,
+        post=post if post.pk else None,
+        simhash=to_signed64(simhash),
+        created=now,
+        **{f'band{band}': value
+           for band, value in enumerate(get_bands(simhash))}
+    )
+
+
+def check_post(post):
+    """Проверяет новый пост или правку поста до сохранения.
+
+    Возвращает None, если пост можно публиковать, иначе SPAM_ACTION:
+    'reject' - пост отклоняется, 'quarantine' - пост уже отложен в
+    QuarantinedPost и в ленты не попадает. Отложенная правка
+    опубликованного поста ссылается на него.
+    """
+    if len(WORD_RE.findall(post.text)) < settings.SPAM_MIN_WORDS:
+        return None
+    simhash = get_simhash(post.text)
+    copies = count_copies(simhash, post)
+    post._fingerprint = remember(simhash, post)
+    if copies < settings.SPAM_MAX_COPIES:
+        return None
+    if settings.SPAM_ACTION == 'quarantine':
+        QuarantinedPost.objects.create(
+            author=post.author,
+            group=post.group,
+            text=post.text,
+            image=post.image,
+            copies=copies,
+            post=post if post.pk else None
+        )
+    return settings.SPAM_ACTION
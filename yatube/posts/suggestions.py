@@ -0,0 +1,157 @@
+"""Рекомендации «на кого подписаться» по общим подпискам.
+
+Граф подписок - разреженная матрица A (читатели x авторы). Оценка
+автора a для читателя u - число путей u -> x <- v -> a, то есть строка
+u произведения A * A^T * A: сколько раз a встречается в подписках
+читателей, подписанных на тех же авторов, что и u. Пользователи
+обрабатываются пачками по первичному ключу, и для каждой пачки читается
+только её окрестность в два шага: подписки пачки, подписчики этих
+авторов и их подписки. Слишком длинные списки (популярные авторы,
+подписчики на всех подряд) обрезаются до FOLLOW_SUGGESTIONS_MAX_FANOUT,
+поэтому память зависит от размера пачки, а не от всей таблицы подписок.
+Отключённые пользователи в рекомендации не попадают.
+"""
+from array import array
+from collections import Counter, defaultdict
+from heapq import nlargest
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Follow, FollowSuggestion, User
+from .utils import bump_cache_generation, iter_pk_chunks
+
+
+def load_follows(ids, by, chunk_size, limit=None):
+    """Списки смежности подписок для пользователей ids.
+
+    При by='user' это авторы, на которых подписан каждый пользователь,
+    при by='author' - его подписчики, не больше limit на пользователя.
+    Список ids делится на пачки, строки читаются через iterator().
+    """
+    other = 'author' if by == 'user' else 'user'
+    lists = defaultdict(lambda: array('q'))
+    ids = sorted(ids)
+    for start in range(0, len(ids), chunk_size):
+        rows = Follow.objects.filter(**{
+            f'{by}_id__in': ids[start:start + chunk_size]
+        }).order_by('pk').values_list(
+            f'{by}_id', f'{other}_id'
+        ).iterator(chunk_size=chunk_size)
+        for key, value in rows:
+            if limit is None or len(lists[key]) < limit:
+                lists[key].append(value)
+    return lists
+
+
+def load_neighbourhood(user_ids, chunk_size, fanout):
+    """Подписки пачки пользователей и всё, что нужно для их строк
+    A * A^T * A: подписчики их авторов и подписки этих подписчиков."""
+    following = load_follows(user_ids, 'user', chunk_size)
+    authors = {author for authors in following.values() for author in authors}
+    followers = load_follows(authors, 'author', chunk_size, fanout)
+    readers = {
+        reader for readers in followers.values() for reader in readers
+    }
+    following.update(load_follows(
+        readers - set(following), 'user', chunk_size, fanout
+    ))
+    return following, followers
+
+
+def load_inactive(following, chunk_size):
+    """Отключённые пользователи среди авторов из списков подписок."""
+    authors = sorted({
+        author for authors in following.values() for author in authors
+    })
+    inactive = set()
+    for start in range(0, len(authors), chunk_size):
+        inactive.update(User.objects.filter(
+            pk__in=authors[start:start + chunk_size], is_active=False
+        ).values_list('pk', flat=True))
+    return inactive
+
+
+def get_popular_authors(count):
+    return list(Follow.objects.filter(
+        author__is_active=True
+    ).values('author_id').annotate(
+        followers=Count('pk')
+    ).order_by('-followers', 'author_id').values_list(
+        'author_id', flat=True
+    )[:count])
+
+
+def score_authors(user_id, following, followers, fanout, inactive=()):
+    """Счётчик общих подписок для активных авторов, на которых user не
+    подписан."""
+    followed = following.get(user_id, ())
+    scores = Counter()
+    for author in followed:
+        for reader in followers[author][:fanout]:
+            if reader != user_id:
+                scores.update(
+                    candidate for candidate in following[reader][:fanout]
+                    if candidate not in inactive
+                )
+    scores.pop(user_id, None)
+    for author in followed:
+        scores.pop(author, None)
+    return scores
+
+
+def suggest(user_id, following, followers, popular, count, fanout,
+            inactive=()):
+    """Лучшие авторы по общим подпискам, добитые популярными авторами."""
+    scores = score_authors(user_id, following, followers, fanout, inactive)
+    best = nlargest(
+        count, scores.items(), key=lambda item: (item[1], -item[0])
+    )
+    chosen = {author for author, _ in best}
+    skip = chosen | set(following.get(user_id, ())) | {user_id}
+    for author in popular:
+        if len(best) >= count:
+            break
+        if author not in skip:
+            best.append((author, 0))
+    return best
+
+
+def build_suggestions(batch_size, count=None, fanout=None):
+    """Пересчитывает рекомендации пачками пользователей.
+
+    После каждой пачки отдаёт число обработанных пользователей.
+    """
+    count = count or settings.FOLLOW_SUGGESTIONS_COUNT
+    fanout = fanout or settings.FOLLOW_SUGGESTIONS_MAX_FANOUT
+    popular = get_popular_authors(count * 2)
+    for chunk in iter_pk_chunks(User.objects.all(), batch_size):
+        following, followers = load_neighbourhood(chunk, batch_size, fanout)
+        inactive = load_inactive(following, batch_size)
+        rows = [
+            FollowSuggestion(
+                user_id=user_id, author_id=author_id, rank=rank, score=score
+            )
+            for user_id in chunk
+            for rank, (author_id, score) in enumerate(suggest(
+                user_id, following, followers, popular, count, fanout,
+                inactive
+            ), 1)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=chunk).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+        yield len(chunk)
+    bump_cache_generation('suggestions')
+
+
+def get_suggestions(user):
+    """Рекомендации для страницы: один запрос по индексу (user, rank)."""
+    if not user.is_authenticated:
+        return []
+    return list(FollowSuggestion.objects.filter(
+        user=user
+    ).select_related('author').order_by(
+        'rank'
+    )[:settings.FOLLOW_SUGGESTIONS_ON_PAGE])
@@ -0,0 +1,72 @@
+import logging
+
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+logger = logging.getLogger('sorl.thumbnail')
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    """Миниатюра картинки поста по POST_THUMBNAIL или None.
+
+    Как и тег thumbnail из sorl, ошибки миниатюр только пишет в журнал.
+    """
+    from sorl.thumbnail import get_thumbnail
+    from sorl.thumbnail.conf import settings as sorl_settings
+
+    if not image:
+        return None
+    geometry, options = settings.POST_THUMBNAIL
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail tag failed')
+        return None
+
+
+@register.simple_tag
+def prefetch_post_thumbnails(posts):
+    """Сведения о миниатюрах страницы постов одним запросом, до цикла."""
+    from core.thumbnails import prefetch_thumbnails
+
+    geometry, options = settings.POST_THUMBNAIL
+    prefetch_thumbnails([post.image for post in posts], geometry, **options)
+    return ''
+
+
+@register.simple_tag
+def thumbnail_size(width, height, geometry, crop=False, upscale=False):
+    """Размер миниатюры sorl-thumbnail по сохранённым размерам исходника.
+
+    Считается так же, как в sorl: без crop картинка вписывается в
+    geometry, с crop - заполняет её и обрезается. Файл и KV-хранилище
+    миниатюр не нужны. None, если размеры исходника неизвестны.
+    """
+    if not width or not height:
+        return None
+    target_width, target_height = (int(side) for side in geometry.split('x'))
+    ratios = (target_width / width, target_height / height)
+    factor = max(ratios) if crop else min(ratios)
+    if not upscale:
+        factor = min(factor, 1)
+    scaled_width = max(round(width * factor), 1)
+    scaled_height = max(round(height * factor), 1)
+    if crop:
+        scaled_width = min(scaled_width, target_width)
+        scaled_height = min(scaled_height, target_height)
+    return scaled_width, scaled_height
+
+
+@register.simple_tag
+def post_thumbnail_size(post):
+    """Размер миниатюры по сохранённым размерам картинки поста."""
+    geometry, options = settings.POST_THUMBNAIL
+    return thumbnail_size(
+        post.image_width, post.image_height, geometry,
+        crop=bool(options.get('crop')), upscale=options.get('upscale', False)
+    )
@@ -0,0 +1,196 @@
+from http import HTTPStatus
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import delete_comments_in_chunks, delete_posts_in_chunks
+
+
+class TestAdminChangelist(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin_user)
+
+    def create_rows(self, number):
+        start = User.objects.count()
+        for i in range(start, start + number):
+            author = User.objects.create_user(username=f'author{i}')
+            post = Post.objects.create(
+                author=author,
+                group=self.group,
+                text=f'Тестовый пост {i}'
+            )
+            Comment.objects.create(post=post, author=author, text='Коммент')
+            Follow.objects.create(user=self.admin_user, author=author)
+
+    def get_queries_count(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        urls = (
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_comment_changelist'),
+            reverse('admin:posts_follow_changelist'),
+            reverse('admin:posts_group_changelist'),
+        )
+        self.create_rows(2)
+        few = {url: self.get_queries_count(url) for url in urls}
+        self.create_rows(8)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.get_queries_count(url), few[url])
+
+    def test_count_is_cached(self):
+        url = reverse('admin:posts_post_changelist')
+        self.create_rows(3)
+        response = self.admin_client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 3)
+        Post.objects.create(author=self.admin_user, text='Новый пост')
+        response = self.admin_client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+
+@override_settings(BULK_CHUNK_SIZE=2)
+class TestAdminChunkedActions(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin_user)
+        for i in range(5):
+            post = Post.objects.create(
+                author=self.author,
+                text=f'Тестовый пост {i}'
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text='Коммент'
+            )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def run_action(self, url, action, pks, **data):
+        data.update({
+            'action': action,
+            ACTION_CHECKBOX_NAME: pks,
+        })
+        response = self.admin_client.post(url, data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'admin/bulk_action.html')
+        data['post'] = 'yes'
+        response = self.admin_client.post(url, data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_delete_posts_in_chunks(self):
+        pks = list(Post.objects.values_list('pk', flat=True)[:4])
+        content = self.run_action(
+            reverse('admin:posts_post_changelist'), 'delete_in_chunks', pks
+        )
+        self.assertIn('Обработано 4 из 4', content)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def count_post_updates(self, chunks):
+        with CaptureQueriesContext(connection) as context:
+            list(chunks)
+        return sum(
+            query['sql'].startswith('UPDATE "posts_post"')
+            for query in context.captured_queries
+        )
+
+    def test_chunks_recount_comments_once(self):
+        post = Post.objects.first()
+        for i in range(3):
+            Comment.objects.create(
+                post=post, author=self.author, text=f'Ещё {i}'
+            )
+        updates = self.count_post_updates(delete_comments_in_chunks(
+            Comment.objects.filter(author=self.reader), 100
+        ))
+        self.assertEqual(updates, 1)
+        self.assertEqual(
+            set(Post.objects.values_list('comments_count', flat=True)),
+            {0, 3}
+        )
+        updates = self.count_post_updates(
+            delete_posts_in_chunks(Post.objects.all(), 100)
+        )
+        self.assertEqual(updates, 0)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reassign_group(self):
+        pks = list(Post.objects.values_list('pk', flat=True))
+        self.run_action(
+            reverse('admin:posts_post_changelist'),
+            'reassign_group',
+            pks,
+            group=self.group.pk
+        )
+        self.assertEqual(self.group.posts.count(), len(pks))
+
+    def test_transfer_author(self):
+        pks = list(Post.objects.values_list('pk', flat=True)[:3])
+        self.run_action(
+            reverse('admin:posts_post_changelist'),
+            'transfer_author',
+            pks,
+            username=self.reader.username
+        )
+        self.assertEqual(self.reader.posts.count(), 3)
+
+    def test_delete_users_in_chunks(self):
+        self.run_action(
+            reverse('admin:auth_user_changelist'),
+            'delete_in_chunks',
+            [self.author.pk]
+        )
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_view_shows_summary(self):
+        post = Post.objects.first()
+        url = reverse('admin:posts_post_delete', args=(post.pk,))
+        response = self.admin_client.get(url)
+        self.assertEqual(
+            dict(response.context['model_count']),
+            {'Посты': 1, 'Комментарии': 1}
+        )
+        self.admin_client.post(url, {'post': 'yes'})
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Group, Post, User
+
+
+class TestFeeds(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.auth_user,
+            text='Пост в группе',
+            group=self.group
+        )
+
+    def test_feeds_list_posts(self):
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:group_atom', args=(self.group.slug,)),
+            reverse('posts:profile_rss', args=(self.auth_user.username,)),
+            reverse('posts:profile_atom', args=(self.auth_user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост в группе')
+                self.assertContains(
+                    response,
+                    reverse('posts:post_detail', args=(self.post.pk,))
+                )
+        response = self.client.get(reverse('posts:group_rss', args=('no',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_description_is_escaped(self):
+        Post.objects.create(
+            author=self.auth_user, text='<script>alert(1)</script>'
+        )
+        for url in (reverse('posts:index_rss'), reverse('posts:index_atom')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                # Описание в XML экранируется ещё раз поверх HTML.
+                self.assertContains(
+                    response, '&lt;p&gt;&amp;lt;script&amp;gt;'
+                )
+                self.assertNotContains(response, '&lt;p&gt;&lt;script&gt;')
+
+    def test_conditional_get(self):
+        url = reverse('posts:group_rss', args=(self.group.slug,))
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=http_date(
+                    self.post.pub_date.timestamp()
+                )
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_body_is_cached_until_post_write(self):
+        url = reverse('posts:index_rss')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Пост в группе')
+        etag = response['ETag']
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
@@ -1,18 +1,26 @@
+import os
 import shutil
 import tempfile
+from hashlib import sha256
+from io import BytesIO, StringIO
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.forms import CommentForm, PostForm
-from posts.models import Group, Post, User
+from posts.markup import render_text
+from posts.models import Group, Post, QuarantinedPost, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_WORKERS=0)
 class TestPost(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -80,7 +88,157 @@ class TestPost(TestCase):
         self.assertEqual(post.author, self.auth_user)
         self.assertEqual(post.group, self.group)
         self.assertEqual(post.text, form_data['text'])
-        self.assertEqual(post.image, 'posts/small.gif')
+        digest = sha256(self.small_gif).hexdigest()
+        self.assertEqual(post.image, f'posts/{digest[:2]}/{digest}.gif')
+        self.assertIsNotNone(post.image_hash)
+
+    def test_same_image_stored_once(self):
+        for name in ('small.gif', 'copy.GIF'):
+            self.auth_client.post(reverse('posts:post_create'), data={
+                'text': f'Картинка {name}',
+                'image': SimpleUploadedFile(
+                    name=name, content=self.small_gif, content_type='image/gif'
+                )
+            })
+        first, second = Post.objects.exclude(image='')[:2]
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_hash, second.image_hash)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(first.image.path))), 1
+        )
+
+    def test_dedupe_images(self):
+        legacy = FileSystemStorage().save(
+            'posts/legacy.gif', ContentFile(self.small_gif)
+        )
+        for text in ('Первая копия', 'Вторая копия'):
+            Post.objects.create(author=self.auth_user, text=text, image=legacy)
+        Post.objects.create(
+            author=self.auth_user, text='Без файла', image='posts/lost.gif'
+        )
+        out = StringIO()
+        call_command('dedupe_images', '--batch-size', '1', stdout=out)
+        self.assertIn('файлов не найдено: 1', out.getvalue())
+        digest = sha256(self.small_gif).hexdigest()
+        posts = Post.objects.filter(text__endswith='копия')
+        self.assertEqual(
+            set(posts.values_list('image', flat=True)),
+            {f'posts/{digest[:2]}/{digest}.gif'}
+        )
+        self.assertNotIn(None, posts.values_list('image_hash', flat=True))
+        self.assertFalse(FileSystemStorage().exists(legacy))
+
+    def make_jpeg(self, **options):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'red').save(buffer, 'JPEG', **options)
+        return buffer.getvalue()
+
+    def post_image(self, content, name='photo.jpg'):
+        return self.auth_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name=name, content=content, content_type='image/jpeg'
+            )
+        })
+
+    def test_upload_limits(self):
+        cases = (
+            ({'FILE_UPLOAD_MAX_SIZE': len(self.small_gif) - 1}, 'Файл больше'),
+            ({'IMAGE_MAX_PIXELS': 1}, 'мегапикселей'),
+        )
+        for limits, error in cases:
+            with self.subTest(limits=limits), self.settings(**limits):
+                response = self.post_image(self.small_gif, 'small.gif')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    error, ' '.join(response.context['form'].errors['image'])
+                )
+        self.assertFalse(Post.objects.exclude(image='').exists())
+
+    def test_admin_upload_limits(self):
+        admin_client = Client()
+        admin_client.force_login(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        ))
+        cases = (
+            ({'FILE_UPLOAD_MAX_SIZE': len(self.small_gif) - 1}, 'Файл больше'),
+            ({'IMAGE_MAX_PIXELS': 1}, 'мегапикселей'),
+        )
+        urls = (
+            reverse('admin:posts_post_add'),
+            reverse('admin:posts_quarantinedpost_add'),
+        )
+        for url in urls:
+            for limits, error in cases:
+                with self.subTest(url=url, limits=limits), \
+                        self.settings(**limits):
+                    response = admin_client.post(url, data={
+                        'text': 'Пост с картинкой',
+                        'author': self.auth_user.pk,
+                        'copies': 1,
+                        'image': SimpleUploadedFile(
+                            name='small.gif',
+                            content=self.small_gif,
+                            content_type='image/gif'
+                        )
+                    })
+                    self.assertEqual(response.status_code, 200)
+                    self.assertContains(response, error)
+        self.assertFalse(Post.objects.exclude(image='').exists())
+        self.assertFalse(QuarantinedPost.objects.exists())
+
+    def test_exif_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        content = self.make_jpeg(exif=exif.tobytes())
+        self.post_image(content)
+        post = Post.objects.exclude(image='').get()
+        self.assertNotIn(sha256(content).hexdigest(), post.image.name)
+        with open(post.image.path, 'rb') as file:
+            digest = sha256(file.read()).hexdigest()
+        self.assertEqual(post.image, f'posts/{digest[:2]}/{digest}.jpg')
+        self.assertIsNotNone(post.image_hash)
+        with Image.open(post.image.path) as image:
+            self.assertFalse(image.getexif())
+
+    def test_image_metadata(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повернуть на 90 градусов
+        buffer = BytesIO()
+        Image.new('RGB', (64, 32), (0, 0, 255)).save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        self.post_image(buffer.getvalue())
+        post = Post.objects.exclude(image='').get()
+        self.assertEqual((post.image_width, post.image_height), (32, 64))
+        self.assertEqual(post.image_color[:5], '#0000')
+        self.assertTrue(post.image_placeholder.startswith(
+            'data:image/jpeg;base64,'
+        ))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (32, 64))
+
+    def test_process_images_command(self):
+        self.post_image(self.make_jpeg())
+        Post.objects.update(image_width=None, image_placeholder='')
+        call_command('process_images', stdout=StringIO())
+        post = Post.objects.exclude(image='').get()
+        self.assertEqual((post.image_width, post.image_height), (64, 64))
+        self.assertTrue(post.image_placeholder)
+
+    def test_broken_image_dropped(self):
+        # Такой файл проходит проверку формы, но не раскодируется.
+        content = self.make_jpeg()
+        broken = FileSystemStorage().save(
+            'posts/broken.jpg', ContentFile(content[:len(content) // 2])
+        )
+        post = Post.objects.create(
+            author=self.auth_user, text='Битая картинка', image=broken
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.image, '')
+        self.assertIsNone(post.image_hash)
+        self.assertFalse(FileSystemStorage().exists(broken))
 
     def test_post_unautorized_create(self):
         posts_count = Post.objects.count()
@@ -167,3 +325,44 @@ class TestPost(TestCase):
             response,
             '/auth/login/?next=%2Fposts%2F1%2Fcomment%2F'
         )
+
+    def test_post_text_prerendered(self):
+        form_data = {
+            'text': '<b>Привет</b>, @NoName и @nobody!\n\nhttps://example.com',
+        }
+        self.auth_client.post(reverse('posts:post_create'), data=form_data)
+        post: Post = Post.objects.first()
+        self.assertIn('&lt;b&gt;Привет&lt;/b&gt;', post.text_html)
+        self.assertIn(
+            f'<a href="{reverse("posts:profile", args=("NoName",))}">'
+            '@NoName</a>',
+            post.text_html
+        )
+        self.assertNotIn('<a href="/profile/nobody/">', post.text_html)
+        self.assertIn('<a href="https://example.com"', post.text_html)
+        self.assertEqual(
+            post.excerpt,
+            '<b>Привет</b>, @NoName и @nobody! https://example.com'
+        )
+
+    def test_mentions_not_replaced_in_links(self):
+        html = render_text(
+            '@NoName: http://x.com/?u=@NoName', usernames={'NoName'}
+        )
+        self.assertEqual(html.count('<a '), 2)
+        self.assertIn(
+            '<a href="http://x.com/?u=%40NoName" rel="nofollow">'
+            'http://x.com/?u=@NoName</a>',
+            html
+        )
+        self.assertTrue(html.startswith(
+            f'<p><a href="{reverse("posts:profile", args=("NoName",))}">'
+        ))
+
+    def test_render_texts_command(self):
+        post = Post.objects.first()
+        self.assertEqual(post.text_html, '')
+        call_command('render_texts', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Первый тестовый пост</p>')
+        self.assertEqual(post.excerpt, 'Первый тестовый пост')
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostBucket, User
+from posts.similarity import get_signature, get_similar_posts
+
+BASE_TEXT = (
+    'Сегодня мы ходили в поход по горам Алтая, ночевали у озера '
+    'и смотрели на звёзды до самого утра'
+)
+
+
+class TestSimilarPosts(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(author=cls.auth_user, text=BASE_TEXT)
+        cls.near = Post.objects.create(
+            author=cls.auth_user, text=BASE_TEXT + ', было холодно'
+        )
+        cls.far = Post.objects.create(
+            author=cls.auth_user,
+            text='Рецепт борща: свёкла, капуста, картофель и немного уксуса'
+        )
+
+    def test_signature_estimates_similarity(self):
+        signature = get_signature(BASE_TEXT)
+        self.assertEqual(get_signature(BASE_TEXT.upper() + '!'), signature)
+        self.assertEqual(get_signature('...'), [])
+
+        def similarity(text):
+            return sum(
+                a == b for a, b in zip(signature, get_signature(text))
+            ) / len(signature)
+
+        self.assertGreater(similarity(self.near.text), 0.7)
+        self.assertLess(similarity(self.far.text), 0.2)
+
+    def test_similar_posts_on_write(self):
+        self.assertEqual(get_similar_posts(self.post), [self.near])
+        self.near.text = self.far.text
+        self.near.save()
+        self.assertEqual(get_similar_posts(self.post), [])
+        self.assertEqual(get_similar_posts(self.far), [self.near])
+
+    def test_unchanged_text_is_not_reindexed(self):
+        post = Post.objects.get(pk=self.post.pk)
+        PostBucket.objects.filter(post=post).delete()
+        post.save()
+        self.assertFalse(PostBucket.objects.filter(post=post).exists())
+        post.text = BASE_TEXT + '!'
+        post.save()
+        self.assertTrue(PostBucket.objects.filter(post=post).exists())
+
+    def test_post_detail_shows_similar(self):
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        response = self.client.get(url)
+        self.assertEqual(response.context['similar_posts'], [self.near])
+        self.assertContains(
+            response, reverse('posts:post_detail', args=(self.near.pk,))
+        )
+
+    def test_build_similar_posts(self):
+        PostBucket.objects.all().delete()
+        self.assertEqual(get_similar_posts(self.post), [])
+        call_command(
+            'build_similar_posts', '--batch-size', '2', stdout=StringIO()
+        )
+        self.assertEqual(get_similar_posts(self.post), [self.near])
+        buckets = list(PostBucket.objects.order_by('pk').values_list(
+            'post', 'band', 'bucket'
+        ))
+        call_command('build_similar_posts', stdout=StringIO())
+        self.assertEqual(list(PostBucket.objects.order_by('pk').values_list(
+            'post', 'band', 'bucket'
+        )), buckets)
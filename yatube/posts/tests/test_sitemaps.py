@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, SitemapShard, User
+from posts.sitemaps import build_sitemaps
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT,
+    SITEMAP_SHARD_SIZE=3,
+    SITEMAP_BASE_URL='https://yatube.example'
+)
+class TestSitemaps(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        super().setUp()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        self.posts = [
+            Post.objects.create(author=self.auth_user, text='Пост')
+            for _ in range(4)
+        ]
+
+    def read(self, name):
+        with open(os.path.join(TEMP_SITEMAP_ROOT, name)) as sitemap:
+            return sitemap.read()
+
+    def get_post_shard(self, post):
+        return f'sitemap-posts-{post.pk // 3}.xml'
+
+    def test_all_urls_are_listed(self):
+        build_sitemaps()
+        index = self.read('sitemap.xml')
+        urls = ''.join(
+            self.read(name) for name in os.listdir(TEMP_SITEMAP_ROOT)
+            if name != 'sitemap.xml'
+        )
+        for post in self.posts:
+            self.assertIn(
+                'https://yatube.example'
+                + reverse('posts:post_detail', args=(post.pk,)),
+                urls
+            )
+            self.assertIn(
+                'https://yatube.example'
+                + reverse('posts:sitemap_shard', args=(
+                    'posts', post.pk // 3
+                )),
+                index
+            )
+        self.assertIn(
+            reverse('posts:group_list', args=(self.group.slug,)), urls
+        )
+        self.assertIn(
+            reverse('posts:profile', args=(self.auth_user.username,)), urls
+        )
+        self.assertIn('<loc>https://yatube.example/</loc>', urls)
+
+    def test_only_dirty_shards_are_rebuilt(self):
+        build_sitemaps()
+        self.assertEqual(build_sitemaps(), [])
+        post = Post.objects.create(author=self.auth_user, text='Новый')
+        self.assertEqual(build_sitemaps(), [self.get_post_shard(post)])
+        deleted = self.posts[0]
+        shard_name = self.get_post_shard(deleted)
+        url = reverse('posts:post_detail', args=(deleted.pk,))
+        deleted.delete()
+        self.assertEqual(build_sitemaps(), [shard_name])
+        self.assertNotIn(url, self.read(shard_name))
+
+    def test_renames_rebuild_shards(self):
+        build_sitemaps()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed-group'
+        group.save()
+        user = User.objects.get(pk=self.auth_user.pk)
+        user.username = 'Renamed'
+        user.save()
+        self.assertEqual(sorted(build_sitemaps()), [
+            'sitemap-groups-0.xml', 'sitemap-profiles-0.xml'
+        ])
+        self.assertIn(
+            reverse('posts:group_list', args=('renamed-group',)),
+            self.read('sitemap-groups-0.xml')
+        )
+        user.save(update_fields=('last_login',))
+        group.save()
+        self.assertEqual(build_sitemaps(), [])
+
+    def test_inactive_users_are_skipped(self):
+        inactive = User.objects.create_user(username='Disabled')
+        build_sitemaps()
+        url = reverse('posts:profile', args=(inactive.username,))
+        shard_name = f'sitemap-profiles-{inactive.pk // 3}.xml'
+        self.assertIn(url, self.read(shard_name))
+        inactive.is_active = False
+        inactive.save(update_fields=('is_active',))
+        self.assertEqual(build_sitemaps(), [shard_name])
+        self.assertNotIn(url, self.read(shard_name))
+
+    def test_views_serve_files(self):
+        response = self.client.get(reverse('posts:sitemap'))
+        self.assertEqual(response.status_code, 404)
+        out = StringIO()
+        call_command('build_sitemaps', '--all', stdout=out)
+        self.assertIn(self.get_post_shard(self.posts[0]), out.getvalue())
+        response = self.client.get(reverse('posts:sitemap'))
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        shard = SitemapShard.objects.filter(section='posts').first()
+        response = self.client.get(reverse(
+            'posts:sitemap_shard', args=('posts', shard.number)
+        ))
+        self.assertIn(
+            b'<urlset', b''.join(response.streaming_content)
+        )
+        response = self.client.get(reverse(
+            'posts:sitemap_shard', args=('unknown', 0)
+        ))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, PostFingerprint, QuarantinedPost, User
+from posts.spam import get_distance, get_simhash
+from posts.utils import get_cache_generation
+
+SPAM_TEXT = (
+    'Лучшие скидки недели! Заходите в наш магазин по ссылке и получите '
+    'подарок за первый заказ, предложение ограничено'
+)
+
+
+@override_settings(SPAM_MAX_COPIES=2, SPAM_ACTION='quarantine')
+class TestSpam(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.spammers = [
+            User.objects.create_user(username=f'spammer{number}')
+            for number in range(4)
+        ]
+
+    def post_as(self, user, text, follow=False):
+        client = Client()
+        client.force_login(user)
+        return client.post(
+            reverse('posts:post_create'), {'text': text}, follow=follow
+        )
+
+    def edit_as(self, user, post, text):
+        client = Client()
+        client.force_login(user)
+        return client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': text},
+            follow=True
+        )
+
+    def publish(self, quarantined):
+        admin_user, _ = User.objects.get_or_create(
+            username='admin', is_staff=True, is_superuser=True
+        )
+        client = Client()
+        client.force_login(admin_user)
+        client.post(reverse('admin:posts_quarantinedpost_changelist'), {
+            'action': 'publish',
+            ACTION_CHECKBOX_NAME: [quarantined.pk],
+        })
+
+    def test_simhash_distance(self):
+        simhash = get_simhash(SPAM_TEXT)
+        self.assertLessEqual(
+            get_distance(simhash, get_simhash(SPAM_TEXT + '!!! 1')), 3
+        )
+        self.assertGreater(
+            get_distance(simhash, get_simhash('Сегодня ходили в поход')), 10
+        )
+
+    def test_quarantine_wave(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        self.assertEqual(Post.objects.count(), 2)
+        generation = get_cache_generation('pages')
+        response = self.post_as(self.spammers[2], SPAM_TEXT + '!!! 1')
+        self.assertRedirects(
+            response, reverse('posts:profile', args=('spammer2',))
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(get_cache_generation('pages'), generation)
+        quarantined = QuarantinedPost.objects.get()
+        self.assertEqual(quarantined.author, self.spammers[2])
+        self.assertEqual(quarantined.copies, 2)
+        self.post_as(self.spammers[3], 'Сегодня ходили в поход по горам')
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_quarantine_message(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        response = self.post_as(self.spammers[2], SPAM_TEXT, follow=True)
+        self.assertContains(response, 'проверки модератором')
+
+    def test_short_texts_are_not_checked(self):
+        for spammer in self.spammers:
+            self.post_as(spammer, 'Спасибо!')
+        self.assertEqual(Post.objects.count(), len(self.spammers))
+        self.assertFalse(QuarantinedPost.objects.exists())
+        self.assertFalse(PostFingerprint.objects.exists())
+
+    def test_edit_is_checked(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        post = Post.objects.create(
+            author=self.spammers[2], text='Сегодня ходили в поход по горам'
+        )
+        response = self.edit_as(self.spammers[2], post, SPAM_TEXT)
+        self.assertContains(response, 'проверки модератором')
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Сегодня ходили в поход по горам')
+        quarantined = QuarantinedPost.objects.get()
+        self.assertEqual(quarantined.post, post)
+        self.publish(quarantined)
+        post.refresh_from_db()
+        self.assertEqual(post.text, SPAM_TEXT)
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_own_edits_are_not_copies(self):
+        self.post_as(self.spammers[0], SPAM_TEXT)
+        post = Post.objects.get()
+        for number in range(4):
+            response = self.edit_as(
+                self.spammers[0], post, SPAM_TEXT + '!' * (number + 1)
+            )
+            self.assertNotContains(response, 'проверки модератором')
+        post.refresh_from_db()
+        self.assertEqual(post.text, SPAM_TEXT + '!!!!')
+        self.assertFalse(QuarantinedPost.objects.exists())
+        self.assertEqual(PostFingerprint.objects.get().post, post)
+
+    @override_settings(SPAM_ACTION='reject')
+    def test_edit_reject(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        post = Post.objects.create(
+            author=self.spammers[2], text='Сегодня ходили в поход по горам'
+        )
+        response = self.edit_as(self.spammers[2], post, SPAM_TEXT)
+        self.assertTrue(response.context['form'].has_error('text'))
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Сегодня ходили в поход по горам')
+
+    @override_settings(SPAM_ACTION='reject')
+    def test_reject(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        response = self.post_as(self.spammers[2], SPAM_TEXT)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('text'))
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertFalse(QuarantinedPost.objects.exists())
+
+    def test_window(self):
+        for spammer in self.spammers[:2]:
+            self.post_as(spammer, SPAM_TEXT)
+        for fingerprint in PostFingerprint.objects.all():
+            fingerprint.created -= timedelta(days=1)
+            fingerprint.save()
+        self.post_as(self.spammers[2], SPAM_TEXT)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(PostFingerprint.objects.count(), 1)
+
+    def test_admin_publish(self):
+        quarantined = QuarantinedPost.objects.create(
+            author=self.spammers[0], text=SPAM_TEXT, copies=5
+        )
+        self.publish(quarantined)
+        self.assertFalse(QuarantinedPost.objects.exists())
+        post = Post.objects.get()
+        self.assertEqual(post.author, self.spammers[0])
+        self.assertEqual(post.text, SPAM_TEXT)
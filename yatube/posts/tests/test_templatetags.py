@@ -0,0 +1,28 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from posts.templatetags.post_images import thumbnail_size
+
+
+class TestThumbnailSize(SimpleTestCase):
+    def test_thumbnail_size(self):
+        cases = (
+            ((1920, 1080, '960x339'), {}, (603, 339)),
+            ((1920, 1080, '960x339'), {'crop': True}, (960, 339)),
+            ((100, 50, '960x339'), {'crop': True}, (100, 50)),
+            ((100, 50, '960x339'), {'crop': True, 'upscale': True},
+             (960, 339)),
+            ((100, 50, '960x339'), {'upscale': True}, (678, 339)),
+            ((None, None, '960x339'), {}, None),
+        )
+        for args, options, size in cases:
+            with self.subTest(args=args, options=options):
+                self.assertEqual(thumbnail_size(*args, **options), size)
+
+    def test_tag(self):
+        template = Template(
+            '{% load post_images %}'
+            '{% thumbnail_size 1920 1080 "960x339" crop=True as size %}'
+            '{{ size.0 }}x{{ size.1 }}'
+        )
+        self.assertEqual(template.render(Context()), '960x339')
@@ -1,15 +1,22 @@
 import shutil
 import tempfile
+from datetime import datetime, timezone
+from io import StringIO
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.core.paginator import Page
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Comment, Follow, Group, Post, User
+from posts.models import (ArchiveMonth, Comment, FeedEntry, Follow,
+                          FollowSuggestion, Group, Post, User)
+from posts.timeline import transfer_posts_in_chunks
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -299,3 +306,532 @@ class TestPostPaginator(TestCase):
             )
             page: Page = response.context['page_obj']
             self.assertEqual(len(page.object_list), page_info['count'])
+
+
+@override_settings(GROUPS_ON_PAGE=2)
+class TestGroupIndex(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description='Просто описание'
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        for _ in range(2):
+            Post.objects.create(
+                author=self.auth_user,
+                text='Тестовый пост',
+                group=self.groups[0]
+            )
+
+    def test_group_index_counts(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:group_index'))
+        page = response.context['page_obj']
+        self.assertEqual(
+            [group['slug'] for group in page], ['group-0', 'group-1']
+        )
+        self.assertEqual(page.object_list[0]['posts_count'], 2)
+        self.assertEqual(page.object_list[1]['posts_count'], 0)
+        response = self.client.get(
+            reverse('posts:group_index'), {'after': page.next_cursor}
+        )
+        self.assertEqual(
+            [group['slug'] for group in response.context['page_obj']],
+            ['group-2']
+        )
+
+    def test_group_index_cache_invalidation(self):
+        self.client.get(reverse('posts:group_index'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:group_index'))
+        Post.objects.create(
+            author=self.auth_user,
+            text='Ещё пост',
+            group=self.groups[0]
+        )
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            response.context['page_obj'].object_list[0]['posts_count'], 3
+        )
+
+    def test_group_index_caches_first_page_only(self):
+        for cursor in ('group-0', 'group-0', 'anything'):
+            with self.assertNumQueries(1):
+                self.client.get(
+                    reverse('posts:group_index'), {'after': cursor}
+                )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_ON_PAGE=2)
+class TestArchive(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.march = []
+        for day in (1, 15, 31):
+            post = Post.objects.create(author=self.auth_user, text='Март')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=datetime(2022, 3, day, tzinfo=timezone.utc)
+            )
+            self.march.append(post)
+        self.april = Post.objects.create(author=self.auth_user, text='Апр')
+        Post.objects.filter(pk=self.april.pk).update(
+            pub_date=datetime(2022, 4, 1, tzinfo=timezone.utc)
+        )
+        # Даты выставлены в обход сигналов, счётчики собираем заново.
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create([
+            ArchiveMonth(year=2022, month=3, posts_count=3),
+            ArchiveMonth(year=2022, month=4, posts_count=1),
+        ])
+
+    def test_counts_follow_create_and_delete(self):
+        ArchiveMonth.objects.all().delete()
+        post = Post.objects.create(author=self.auth_user, text='Новый')
+        month = ArchiveMonth.objects.get()
+        self.assertEqual(
+            (month.year, month.month, month.posts_count),
+            (post.pub_date.year, post.pub_date.month, 1)
+        )
+        Post.objects.create(author=self.auth_user, text='Ещё')
+        post.delete()
+        month.refresh_from_db()
+        self.assertEqual(month.posts_count, 1)
+
+    def test_archive_year(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('posts:archive_year', args=(2022,))
+            )
+        self.assertEqual(
+            [month['posts_count'] for month in response.context['months']],
+            [3, 1]
+        )
+        self.assertEqual(list(response.context['years']), [2022])
+        self.assertEqual(
+            self.client.get(reverse('posts:archive')).url,
+            reverse('posts:archive_year', args=(2022,))
+        )
+        response = self.client.get(
+            reverse('posts:archive_year', args=(2021,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_archive_month_pages(self):
+        url = reverse('posts:archive_month', args=(2022, 3))
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual(response.context['archive'].posts_count, 3)
+        self.assertEqual(list(page), self.march[:0:-1])
+        response = self.client.get(url, {'after': page.next_cursor})
+        page = response.context['page_obj']
+        self.assertEqual(list(page), self.march[:1])
+        self.assertFalse(page.has_next())
+        response = self.client.get(
+            reverse('posts:archive_month', args=(2022, 13))
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TestConditionalGet(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.auth_user,
+            text='Тестовый пост',
+            group=self.group
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.auth_user.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def get_etag(self, client, url):
+        client.get(url)
+        # Первый ответ главной заполняет фрагментный кэш, входящий в ETag.
+        return client.get(url)['ETag']
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.get_etag(self.reader_client, url)
+                # Сессия, пользователь и запрос ETag.
+                with self.assertNumQueries(3):
+                    response = self.reader_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertNotEqual(etag, self.get_etag(self.client, url))
+
+    def test_writes_without_signals_change_etag(self):
+        # Запись другого процесса не меняет поколения в кэше этого.
+        etags = {url: self.get_etag(self.client, url) for url in self.urls}
+        Post.objects.bulk_create([Post(
+            author=self.auth_user, group=self.group, text='Другой процесс'
+        )])
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_writes_change_etag(self):
+        etags = {url: self.get_etag(self.client, url) for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        cache.clear()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_unrelated_writes_keep_etag(self):
+        urls = self.urls[1:]
+        etags = {url: self.get_etag(self.client, url) for url in urls}
+        other = Group.objects.create(title='Другая', slug='other')
+        post = Post.objects.create(
+            author=self.reader, text='Чужой пост', group=other
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 304)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_following_changes_profile_etag(self):
+        url = reverse('posts:profile', args=(self.auth_user.username,))
+        etag = self.get_etag(self.reader_client, url)
+        Follow.objects.create(user=self.reader, author=self.auth_user)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class TestFeedQueries(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.auth_user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Просто описание'
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.auth_user)
+        Follow.objects.create(user=self.auth_user, author=self.auth_user)
+
+    def create_posts(self, number):
+        for i in range(number):
+            author = User.objects.create_user(
+                username=f'author{User.objects.count()}'
+            )
+            post = Post.objects.create(
+                author=author, group=self.group, text=f'Пост {i}'
+            )
+            Post.objects.create(author=self.auth_user, text=f'Мой пост {i}')
+            self.auth_client.post(
+                reverse('posts:add_comment', args=(post.pk,)),
+                {'text': 'Коммент'}
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.auth_client.get(url)
+        return len(context.captured_queries)
+
+    def test_feed_queries_do_not_grow(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.auth_user.username,)),
+            reverse('posts:follow_index'),
+        )
+        self.create_posts(1)
+        few = {url: self.count_queries(url) for url in urls}
+        self.create_posts(4)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), few[url])
+
+    def test_comment_counter(self):
+        self.create_posts(1)
+        post = Post.objects.filter(group=self.group).first()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.last_comment_at, post.comments.get().created)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Комментариев: 1')
+        post.comments.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertIsNone(post.last_comment_at)
+
+    def test_comment_counter_outside_views(self):
+        post = Post.objects.create(author=self.auth_user, text='Пост')
+        first = Comment.objects.create(
+            post=post, author=self.auth_user, text='Первый'
+        )
+        second = Comment.objects.create(
+            post=post, author=self.auth_user, text='Второй'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+        self.assertEqual(post.last_comment_at, second.created)
+        second.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.last_comment_at, first.created)
+
+
+class TestFollowFeedStrategies(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        for i in range(settings.POSTS_ON_PAGE * 2):
+            Post.objects.create(author=cls.authors[i % 3], text=f'Пост {i}')
+        Post.objects.create(
+            author=User.objects.create_user(username='stranger'),
+            text='Чужой пост'
+        )
+
+    def collect_pages(self, client):
+        posts = []
+        params = {}
+        while True:
+            response = client.get(reverse('posts:follow_index'), params)
+            page = response.context['page_obj']
+            posts.extend(page.object_list)
+            if not page.has_next():
+                return posts
+            if hasattr(page, 'next_cursor'):
+                params = {'after': page.next_cursor}
+            else:
+                params = {'page': page.next_page_number()}
+
+    def test_merge_matches_join(self):
+        client = Client()
+        client.force_login(self.reader)
+        with self.settings(FOLLOW_FEED_STRATEGY='join'):
+            joined = self.collect_pages(client)
+        with self.settings(FOLLOW_FEED_STRATEGY='merge'):
+            merged = self.collect_pages(client)
+        self.assertEqual(len(joined), settings.POSTS_ON_PAGE * 2)
+        self.assertEqual(merged, joined)
+
+    def test_bench_command(self):
+        out = StringIO()
+        call_command(
+            'bench_follow_feed', 'reader', repeat=1, writes=True, stdout=out
+        )
+        self.assertIn('join:', out.getvalue())
+        self.assertIn('merge:', out.getvalue())
+        self.assertIn('hybrid:', out.getvalue())
+
+    @override_settings(
+        FOLLOW_FEED_STRATEGY='hybrid', FEED_PUSH_MAX_FOLLOWERS=1
+    )
+    def test_hybrid_matches_join(self):
+        second_reader = User.objects.create_user(username='second')
+        Follow.objects.create(user=second_reader, author=self.authors[0])
+        call_command('fill_feed_entries', stdout=StringIO())
+        self.assertFalse(
+            FeedEntry.objects.filter(post__author=self.authors[0]).exists()
+        )
+        client = Client()
+        client.force_login(self.reader)
+        client.post(reverse('posts:post_create'), {'text': 'Свой пост'})
+        author_client = Client()
+        author_client.force_login(self.authors[1])
+        author_client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post__text='Новый'
+        ).exists())
+        hybrid = self.collect_pages(client)
+        with self.settings(FOLLOW_FEED_STRATEGY='join'):
+            joined = self.collect_pages(client)
+        self.assertEqual(hybrid, joined)
+        client.get(reverse(
+            'posts:profile_unfollow', args=(self.authors[1].username,)
+        ))
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.reader, post__author=self.authors[1]
+        ).exists())
+
+    @override_settings(FOLLOW_FEED_STRATEGY='hybrid')
+    def test_push_outside_views(self):
+        post = Post.objects.create(author=self.authors[1], text='Из shell')
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.authors[1])
+        self.assertTrue(
+            FeedEntry.objects.filter(user=fan, post=post).exists()
+        )
+        Follow.objects.filter(user=fan).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=fan).exists())
+
+    @override_settings(FOLLOW_FEED_STRATEGY='hybrid')
+    def test_transfer_moves_feed_entries(self):
+        post = Post.objects.create(author=self.authors[1], text='Чужой')
+        new_author = User.objects.create_user(username='new_author')
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=new_author)
+        list(transfer_posts_in_chunks(
+            Post.objects.filter(pk=post.pk), 10, new_author
+        ))
+        self.assertEqual(
+            list(FeedEntry.objects.filter(post=post).values_list(
+                'user', flat=True
+            )),
+            [fan.pk]
+        )
+
+    @override_settings(
+        FOLLOW_FEED_STRATEGY='hybrid', FEED_PUSH_MAX_FOLLOWERS=1
+    )
+    def test_hybrid_after_crossing_threshold(self):
+        author = self.authors[1]
+        call_command('fill_feed_entries', stdout=StringIO())
+        client = Client()
+        client.force_login(self.reader)
+        pushed = Post.objects.create(author=author, text='Разложен')
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=author)
+        pulled = Post.objects.create(author=author, text='Не разложен')
+        self.assertFalse(FeedEntry.objects.filter(post=pulled).exists())
+        with self.settings(FOLLOW_FEED_STRATEGY='join'):
+            joined = self.collect_pages(client)
+        self.assertEqual(self.collect_pages(client), joined)
+        self.assertEqual(joined.count(pushed), 1)
+        Follow.objects.filter(user=fan).delete()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=pulled
+        ).exists())
+        self.assertEqual(self.collect_pages(client), joined)
+
+
+class TestFollowSuggestions(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'twin', 'other', 'a', 'b', 'c', 'd')
+        }
+        follows = {
+            'reader': ('a',),
+            'twin': ('a', 'b', 'c'),
+            'other': ('a', 'b', 'd'),
+            'a': ('d',),
+        }
+        for user, authors in follows.items():
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[user], author=cls.users[author]
+                )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.client.force_login(self.users['reader'])
+
+    def build(self):
+        call_command('build_suggestions', '--count', '3', stdout=StringIO())
+
+    def get_suggested(self, name):
+        return list(FollowSuggestion.objects.filter(
+            user=self.users[name]
+        ).order_by('rank').values_list('author__username', 'score'))
+
+    def test_co_follow_scores(self):
+        self.build()
+        self.assertEqual(
+            self.get_suggested('reader'), [('b', 2), ('c', 1), ('d', 1)]
+        )
+        # Без подписок - самые популярные авторы.
+        self.assertEqual(
+            self.get_suggested('d'), [('a', 0), ('b', 0), ('c', 0)]
+        )
+
+    def test_inactive_authors_not_suggested(self):
+        User.objects.filter(username='b').update(is_active=False)
+        self.build()
+        self.assertEqual(self.get_suggested('reader'), [('c', 1), ('d', 1)])
+        self.assertEqual(self.get_suggested('d'), [('a', 0), ('c', 0)])
+
+    def test_partitions_match_single_pass(self):
+        self.build()
+        expected = {name: self.get_suggested(name) for name in self.users}
+        call_command(
+            'build_suggestions', '--count', '3', '--batch-size', '2',
+            stdout=StringIO()
+        )
+        for name in self.users:
+            with self.subTest(name=name):
+                self.assertEqual(self.get_suggested(name), expected[name])
+
+    def test_pages_show_suggestions(self):
+        self.build()
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=('twin',)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    [item.author.username
+                     for item in response.context['suggestions']],
+                    ['b', 'c', 'd']
+                )
+        self.client.get(reverse('posts:profile_follow', args=('b',)))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author.username for item in response.context['suggestions']],
+            ['c', 'd']
+        )
@@ -0,0 +1,279 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+
+from .models import FeedEntry, Follow, Post
+from .utils import CursorPage, iter_pk_chunks, update_posts_in_chunks
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(post):
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор ленты, для битого курсора возвращает None."""
+    try:
+        microseconds, pk = cursor.split('_')
+        return EPOCH + int(microseconds) * MICROSECOND, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def sort_key(post):
+    return post.pub_date, post.pk
+
+
+def older_than(queryset, position, pk_field='pk'):
+    """Записи строго после позиции (pub_date, pk) в порядке ленты."""
+    if position is None:
+        return queryset
+    pub_date, pk = position
+    return queryset.filter(
+        Q(pub_date__lt=pub_date)
+        | Q(pub_date=pub_date, **{f'{pk_field}__lt': pk})
+    )
+
+
+def feed_queryset(queryset):
+    return queryset.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )
+
+
+def iter_author_posts(author_id, position, batch_size):
+    """Лениво отдаёт посты автора от новых к старым пачками.
+
+    Каждая пачка читается по индексу (author, pub_date), следующая
+    запрашивается только если слиянию понадобились ещё посты автора.
+    """
+    queryset = feed_queryset(Post.objects.filter(author_id=author_id))
+    while True:
+        batch = list(older_than(queryset, position)[:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        position = sort_key(batch[-1])
+
+
+def iter_pushed_posts(user, position, batch_size):
+    """Лениво отдаёт посты, заранее разложенные в ленту читателя."""
+    queryset = FeedEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).order_by('-pub_date', '-post')
+    while True:
+        batch = list(older_than(queryset, position, 'post')[:batch_size])
+        for entry in batch:
+            yield entry.post
+        if len(batch) < batch_size:
+            return
+        position = batch[-1].pub_date, batch[-1].post_id
+
+
+def get_pulled_authors(user):
+    """Авторы из подписок, чьи посты не раскладываются по лентам.
+
+    Это авторы, у которых подписчиков больше FEED_PUSH_MAX_FOLLOWERS;
+    их посты подмешиваются в ленту при чтении.
+    """
+    return list(Follow.objects.filter(
+        author__in=Follow.objects.filter(user=user).values('author')
+    ).values('author').annotate(
+        followers=Count('pk')
+    ).filter(
+        followers__gt=settings.FEED_PUSH_MAX_FOLLOWERS
+    ).values_list('author', flat=True))
+
+
+def make_cursor_page(posts, per_page):
+    next_cursor = None
+    if len(posts) > per_page:
+        posts = posts[:per_page]
+        next_cursor = encode_cursor(posts[-1])
+    return CursorPage(posts, next_cursor)
+
+
+def join_page(user, params, per_page):
+    """Текущая стратегия: один запрос с JOIN по подпискам и OFFSET."""
+    posts = feed_queryset(
+        Post.objects.filter(author__following__user=user)
+    )
+    return Paginator(posts, per_page).get_page(params.get('page'))
+
+
+def merge_page(user, params, per_page):
+    """Fan-in on read: k-way слияние последних постов каждого автора.
+
+    Слияние останавливается, как только набрана страница и один пост
+    сверх неё для курсора следующей страницы.
+    """
+    position = decode_cursor(params.get('after'))
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    batch_size = min(per_page + 1, settings.FOLLOW_FEED_MERGE_BATCH)
+    merged = heapq.merge(
+        *(
+            iter_author_posts(author_id, position, batch_size)
+            for author_id in authors
+        ),
+        key=sort_key,
+        reverse=True
+    )
+    return make_cursor_page(list(islice(merged, per_page + 1)), per_page)
+
+
+def hybrid_page(user, params, per_page):
+    """Гибридная лента: разложенные при записи посты обычных авторов
+    плюс посты популярных авторов, подмешанные при чтении.
+    """
+    position = decode_cursor(params.get('after'))
+    batch_size = min(per_page + 1, settings.FOLLOW_FEED_MERGE_BATCH)
+    merged = heapq.merge(
+        iter_pushed_posts(user, position, per_page + 1),
+        *(
+            iter_author_posts(author_id, position, batch_size)
+            for author_id in get_pulled_authors(user)
+        ),
+        key=sort_key,
+        reverse=True
+    )
+    posts = []
+    seen = set()
+    for post in merged:
+        # Посты автора, ставшего популярным, есть и в ленте, и в чтении.
+        if post.pk in seen:
+            continue
+        seen.add(post.pk)
+        posts.append(post)
+        if len(posts) > per_page:
+            break
+    return make_cursor_page(posts, per_page)
+
+
+STRATEGIES = {
+    'join': join_page,
+    'merge': merge_page,
+    'hybrid': hybrid_page,
+}
+
+
+def get_follow_page(user, params, strategy=None):
+    """Страница ленты подписок по выбранной в настройках стратегии.
+
+    Стратегия join отдаёт Page с номерами страниц, остальные -
+    CursorPage с курсором в параметре after.
+    """
+    strategy = strategy or settings.FOLLOW_FEED_STRATEGY
+    return STRATEGIES[strategy](user, params, settings.POSTS_ON_PAGE)
+
+
+def push_enabled():
+    return settings.FOLLOW_FEED_STRATEGY == 'hybrid'
+
+
+def is_pushed(author_id):
+    """Раскладываются ли посты автора по лентам подписчиков."""
+    return Follow.objects.filter(
+        author=author_id
+    ).count() <= settings.FEED_PUSH_MAX_FOLLOWERS
+
+
+def push_posts(author_id, posts):
+    """Раскладывает посты автора по лентам всех его подписчиков.
+
+    posts - пары (pk, pub_date). Уже разложенные посты пропускаются.
+    Возвращает количество записей ленты, которые пытались создать.
+    """
+    created = 0
+    follows = Follow.objects.filter(author=author_id)
+    for chunk in iter_pk_chunks(follows, settings.BULK_CHUNK_SIZE):
+        readers = Follow.objects.filter(pk__in=chunk).values_list(
+            'user_id', flat=True
+        )
+        created += len(FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for user_id in readers
+                for pk, pub_date in posts
+            ),
+            ignore_conflicts=True
+        ))
+    return created
+
+
+def get_backfill_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_POSTS])
+
+
+def push_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Посты авторов с числом подписчиков больше FEED_PUSH_MAX_FOLLOWERS
+    не раскладываются: их читают напрямую в hybrid_page. Возвращает
+    количество созданных записей ленты.
+    """
+    if not is_pushed(post.author_id):
+        return 0
+    return push_posts(post.author_id, [(post.pk, post.pub_date)])
+
+
+def repush_posts(post_ids):
+    """Перекладывает посты в ленты подписчиков их нынешних авторов."""
+    FeedEntry.objects.filter(post_id__in=post_ids).delete()
+    posts = defaultdict(list)
+    for pk, author_id, pub_date in Post.objects.filter(
+        pk__in=post_ids
+    ).values_list('pk', 'author_id', 'pub_date'):
+        posts[author_id].append((pk, pub_date))
+    for author_id, author_posts in posts.items():
+        if is_pushed(author_id):
+            push_posts(author_id, author_posts)
+
+
+def transfer_posts_in_chunks(queryset, chunk_size, author):
+    """Передаёт посты другому автору пачками вместе с записями лент."""
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        yield from update_posts_in_chunks(
+            Post.objects.filter(pk__in=chunk), chunk_size, author=author
+        )
+        if push_enabled():
+            repush_posts(chunk)
+        else:
+            FeedEntry.objects.filter(post_id__in=chunk).delete()
+
+
+def push_author_posts(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if not is_pushed(author_id):
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in get_backfill_posts(author_id)
+        ),
+        ignore_conflicts=True
+    )
+
+
+def remove_author_posts(user_id, author_id):
+    """Убирает посты автора из ленты бывшего подписчика.
+
+    Если автор при этом опустился до FEED_PUSH_MAX_FOLLOWERS
+    подписчиков, hybrid_page перестаёт читать его посты напрямую, и
+    последние из них раскладываются по лентам оставшихся подписчиков.
+    """
+    FeedEntry.objects.filter(user=user_id, post__author=author_id).delete()
+    if Follow.objects.filter(
+        author=author_id
+    ).count() == settings.FEED_PUSH_MAX_FOLLOWERS:
+        push_posts(author_id, get_backfill_posts(author_id))
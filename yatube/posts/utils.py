@@ -1,8 +1,316 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from hashlib import md5
+
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.functional import cached_property
+from sorl.thumbnail import delete
+
+from .models import (Comment, FeedEntry, Follow, FollowSuggestion, Post,
+                     PostFingerprint, QuarantinedPost)
 
 
 def paging(post_list, request):
     paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который хранит результат COUNT(*) в кэше.
+
+    Списки админки на больших таблицах пересчитывают количество строк
+    при каждом открытии страницы, хотя точное число там не нужно.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'admin_count:' + md5(
+            f'{sql}{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+def iter_pk_chunks(queryset, chunk_size):
+    """Отдаёт первичные ключи queryset пачками по возрастанию pk.
+
+    Следующая пачка выбирается условием pk > последнего ключа, поэтому
+    записи можно удалять или изменять прямо во время обхода.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk_qs = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(chunk_qs[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """Удаляет записи без каскадов пачками, отдавая размер каждой пачки."""
+    model = queryset.model
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        model.objects.filter(pk__in=chunk).delete()
+        yield len(chunk)
+
+
+def refresh_comment_counters(post_ids):
+    """Пересчитывает сохранённые счётчики комментариев у постов."""
+    comments = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post')
+    Post.objects.filter(pk__in=post_ids).update(
+        comments_count=Coalesce(
+            Subquery(comments.annotate(count=Count('pk')).values('count')),
+            0
+        ),
+        last_comment_at=Subquery(
+            comments.annotate(last=Max('created')).values('last')
+        ),
+    )
+
+
+_deferred_recounts = threading.local()
+
+
+@contextmanager
+def defer_comment_recounts(exclude=()):
+    """Откладывает пересчёт счётчиков комментариев до выхода из блока.
+
+    Сигнал post_delete комментария внутри блока только запоминает пост,
+    а на выходе все посты пересчитываются одним запросом. Посты из
+    exclude не пересчитываются: их удаляют в том же блоке.
+    """
+    outer = getattr(_deferred_recounts, 'post_ids', None)
+    if outer is not None:
+        yield
+        outer.difference_update(exclude)
+        return
+    _deferred_recounts.post_ids = set()
+    try:
+        yield
+        post_ids = _deferred_recounts.post_ids - set(exclude)
+    finally:
+        del _deferred_recounts.post_ids
+    if post_ids:
+        refresh_comment_counters(post_ids)
+
+
+def recount_comments(post_id):
+    """Пересчитывает счётчики поста сразу или в defer_comment_recounts."""
+    post_ids = getattr(_deferred_recounts, 'post_ids', None)
+    if post_ids is None:
+        refresh_comment_counters([post_id])
+    else:
+        post_ids.add(post_id)
+
+
+def delete_comments_in_chunks(queryset, chunk_size):
+    """Удаляет комментарии пачками.
+
+    Счётчики постов пачки пересчитываются одним запросом.
+    """
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        with transaction.atomic(), defer_comment_recounts():
+            Comment.objects.filter(pk__in=chunk).delete()
+        yield len(chunk)
+
+
+def get_unreferenced_images(images):
+    """Имена файлов из images, на которые больше не ссылается ни один
+    пост: одинаковые картинки хранятся одним файлом."""
+    images = set(images)
+    for model in (Post, QuarantinedPost):
+        images -= set(
+            model.objects.filter(image__in=images).values_list(
+                'image', flat=True
+            )
+        )
+    return images
+
+
+def delete_posts_in_chunks(queryset, chunk_size, delete_images=False):
+    """Удаляет посты вместе с комментариями короткими транзакциями.
+
+    С delete_images=True после каждой пачки удаляются и файлы картинок
+    вместе с миниатюрами. После каждой пачки отдаёт количество
+    удалённых постов.
+    """
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        posts = Post.objects.filter(pk__in=chunk)
+        with transaction.atomic(), defer_comment_recounts(exclude=chunk):
+            images = list(
+                posts.exclude(image='').values_list('image', flat=True)
+            )
+            Comment.objects.filter(post_id__in=chunk).delete()
+            posts.delete()
+        if delete_images:
+            for image in get_unreferenced_images(images):
+                delete(image)
+        yield len(chunk)
+
+
+def get_post_pages(post_ids):
+    return list(Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'author_id', 'group_id'
+    ))
+
+
+def update_posts_in_chunks(queryset, chunk_size, **values):
+    """Обновляет поля постов пачками, отдавая размер каждой пачки."""
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        before = get_post_pages(chunk)
+        Post.objects.filter(pk__in=chunk).update(**values)
+        # update() не отправляет сигналы post_save.
+        for name in ('group_index', 'feeds'):
+            bump_cache_generation(name)
+        bump_post_generations(before + get_post_pages(chunk))
+        yield len(chunk)
+
+
+def delete_quarantined_in_chunks(queryset, chunk_size, delete_images=False):
+    """Удаляет посты из карантина пачками, как delete_posts_in_chunks."""
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        posts = QuarantinedPost.objects.filter(pk__in=chunk)
+        images = list(posts.exclude(image='').values_list('image', flat=True))
+        posts.delete()
+        if delete_images:
+            for image in get_unreferenced_images(images):
+                delete(image)
+        yield len(chunk)
+
+
+def get_user_content(users):
+    """Записи, которые каскадно удаляются вместе с пользователями.
+
+    Посты из карантина, комментарии и посты идут последними: их удаляют
+    отдельные функции.
+    """
+    return (
+        Follow.objects.filter(user__in=users),
+        Follow.objects.filter(author__in=users),
+        FollowSuggestion.objects.filter(user__in=users),
+        FollowSuggestion.objects.filter(author__in=users),
+        PostFingerprint.objects.filter(author__in=users),
+        QuarantinedPost.objects.filter(author__in=users),
+        Comment.objects.filter(author__in=users),
+        Post.objects.filter(author__in=users),
+    )
+
+
+def delete_user_content_in_chunks(users, chunk_size, delete_images=False):
+    """Удаляет подписки, комментарии, посты и служебные записи
+    пользователей пачками, чтобы user.delete() уже нечего было удалять
+    каскадом."""
+    *rows, quarantined, comments, posts = get_user_content(users)
+    yield from delete_in_chunks(
+        FeedEntry.objects.filter(user__in=users), chunk_size
+    )
+    for queryset in rows:
+        yield from delete_in_chunks(queryset, chunk_size)
+    yield from delete_quarantined_in_chunks(
+        quarantined, chunk_size, delete_images
+    )
+    yield from delete_comments_in_chunks(comments, chunk_size)
+    yield from delete_posts_in_chunks(posts, chunk_size, delete_images)
+
+
+class CursorPage:
+    """Страница списка, которая продолжается после ключа последней записи.
+
+    В отличие от Paginator не считает общее количество записей и не
+    использует OFFSET, поэтому одинаково дешева на любой глубине.
+    """
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def cursor_paging(queryset, cursor, key, per_page):
+    """Отдаёт CursorPage со строками values(), у которых key > cursor."""
+    if cursor:
+        queryset = queryset.filter(**{f'{key}__gt': cursor})
+    objects = list(queryset.order_by(key)[:per_page + 1])
+    next_cursor = None
+    if len(objects) > per_page:
+        objects = objects[:per_page]
+        next_cursor = objects[-1][key]
+    return CursorPage(objects, next_cursor)
+
+
+def get_cache_generation(name):
+    """Текущее поколение кэша, которое входит в ключи записей кэша.
+
+    Начальное значение берётся из времени, чтобы после вытеснения
+    счётчика из кэша не вернуться к уже использованному поколению.
+    """
+    return cache.get_or_set(
+        f'generation:{name}', lambda: int(time.time() * 1000), None
+    )
+
+
+def bump_cache_generation(name):
+    """Делает устаревшими все записи кэша с текущим поколением."""
+    try:
+        cache.incr(f'generation:{name}')
+    except ValueError:
+        get_cache_generation(name)
+
+
+def bump_post_generations(posts):
+    """Делает устаревшими ETag страниц, на которых видны посты.
+
+    posts - тройки (pk, author_id, group_id). Меняются поколения поста,
+    профиля автора, группы и общее поколение главной 'pages'.
+    """
+    names = {'pages'}
+    for pk, author_id, group_id in posts:
+        names.update((f'post:{pk}', f'author:{author_id}'))
+        if group_id is not None:
+            names.add(f'group:{group_id}')
+    for name in names:
+        bump_cache_generation(name)
+
+
+def to_signed64(value):
+    """Беззнаковое 64-битное число в диапазоне BigIntegerField."""
+    return value - (1 << 64) if value >> 63 else value
+
+
+def get_month_range(year, month):
+    """Начало месяца и начало следующего в текущем часовом поясе."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = datetime(year + 1, 1, 1)
+    else:
+        end = datetime(year, month + 1, 1)
+    return start, timezone.make_aware(end)
@@ -1,24 +1,50 @@
+import os
+from datetime import date
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
+
+from core.uploads import get_rejected_uploads
 
+from .etags import group_etag, index_etag, post_detail_etag, profile_etag
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import paging
+from .models import (ArchiveMonth, Follow, FollowSuggestion, Group, Post,
+                     User)
+from .similarity import get_similar_posts
+from .sitemaps import SECTIONS, get_shard_path
+from .spam import check_post
+from .suggestions import get_suggestions
+from .timeline import (decode_cursor, feed_queryset, get_follow_page,
+                       make_cursor_page, older_than)
+from .utils import (cursor_paging, get_cache_generation, get_month_range,
+                    paging)
 
 
+@condition(etag_func=index_etag)
 def index(request):
     template = 'posts/index.html'
-    page_obj = paging(Post.objects.select_related(), request)
+    page_obj = paging(
+        Post.objects.select_related('author', 'group'), request
+    )
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group_recived = get_object_or_404(Group, slug=slug)
-    page_obj = paging(group_recived.posts.all(), request)
+    page_obj = paging(
+        group_recived.posts.select_related('author', 'group'), request
+    )
     context = {
         'group': group_recived,
         'page_obj': page_obj,
@@ -26,47 +52,157 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+def group_index(request):
+    template = 'posts/group_index.html'
+    cursor = request.GET.get('after', '')
+    # Кэшируется только первая страница: курсор приходит от клиента, и
+    # ключи с ним позволили бы заполнить кэш произвольными записями.
+    cache_key = f'group_index:{get_cache_generation("group_index")}'
+    page_obj = None if cursor else cache.get(cache_key)
+    if page_obj is None:
+        groups = Group.objects.annotate(
+            posts_count=Count('posts'),
+            last_pub_date=Max('posts__pub_date'),
+        ).values('title', 'slug', 'posts_count', 'last_pub_date')
+        page_obj = cursor_paging(
+            groups, cursor, 'slug', settings.GROUPS_ON_PAGE
+        )
+        if not cursor:
+            cache.set(
+                cache_key, page_obj, settings.GROUP_INDEX_CACHE_TIMEOUT
+            )
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@condition(etag_func=profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
     post_user = get_object_or_404(User, username=username)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=post_user).exists()
-    page_obj = paging(post_user.posts.all(), request)
+    page_obj = paging(
+        post_user.posts.select_related('author', 'group'), request
+    )
     context = {
         'post_user': post_user,
         'page_obj': page_obj,
         'following': following,
+        'suggestions': get_suggestions(request.user),
+    }
+    return render(request, template, context)
+
+
+def archive_index(request):
+    latest = ArchiveMonth.objects.filter(
+        posts_count__gt=0
+    ).order_by('-year').values_list('year', flat=True).first()
+    if latest is None:
+        raise Http404
+    return redirect('posts:archive_year', latest)
+
+
+def archive_year(request, year):
+    template = 'posts/archive_year.html'
+    months = [
+        {
+            'date': date(year, month.month, 1),
+            'posts_count': month.posts_count,
+        }
+        for month in ArchiveMonth.objects.filter(
+            year=year, posts_count__gt=0
+        ).order_by('month')
+    ]
+    if not months:
+        raise Http404
+    years = ArchiveMonth.objects.filter(
+        posts_count__gt=0
+    ).order_by('-year').values_list('year', flat=True).distinct()
+    context = {
+        'archive_year': year,
+        'months': months,
+        'years': years,
+    }
+    return render(request, template, context)
+
+
+def archive_month(request, year, month):
+    template = 'posts/archive_month.html'
+    if not 1 <= month <= 12:
+        raise Http404
+    archive = get_object_or_404(
+        ArchiveMonth, year=year, month=month, posts_count__gt=0
+    )
+    start, end = get_month_range(year, month)
+    posts = feed_queryset(
+        Post.objects.filter(pub_date__gte=start, pub_date__lt=end)
+    )
+    position = decode_cursor(request.GET.get('after'))
+    page_obj = make_cursor_page(
+        list(older_than(posts, position)[:settings.POSTS_ON_PAGE + 1]),
+        settings.POSTS_ON_PAGE
+    )
+    context = {
+        'archive': archive,
+        'month_start': start.date(),
+        'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@condition(etag_func=post_detail_etag)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
     post_detailed = get_object_or_404(
-        Post.objects.select_related(), pk=post_id
+        Post.objects.select_related('author', 'group'), pk=post_id
     )
-    comments = post_detailed.comments.all()
+    comments = post_detailed.comments.select_related('author')
     form = CommentForm(request.POST or None)
     context = {
         'post': post_detailed,
         'comments': comments,
         'form': form,
+        'similar_posts': get_similar_posts(post_detailed),
     }
     return render(request, template, context)
 
 
+def check_spam(request, form, post):
+    """Проверяет пост до сохранения: копии спама не трогают ленты и кеши.
+
+    Отклонённый пост получает ошибку в форме, об отложенном в карантин
+    автору говорит сообщение. Возвращает решение check_post.
+    """
+    verdict = check_post(post)
+    if verdict == 'reject':
+        form.add_error('text', 'Такой текст уже много раз публиковали')
+    elif verdict == 'quarantine':
+        messages.info(
+            request,
+            'Пост похож на массовую рассылку и будет опубликован после '
+            'проверки модератором'
+        )
+    return verdict
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None
+        files=request.FILES or None,
+        rejected_uploads=get_rejected_uploads(request)
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
-        return redirect('posts:profile', request.user)
+        verdict = check_spam(request, form, post)
+        if verdict is None:
+            form.save()
+        if verdict != 'reject':
+            return redirect('posts:profile', request.user)
     return render(request, template, {'form': form, 'is_edit': False})
 
 
@@ -79,11 +215,17 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        rejected_uploads=get_rejected_uploads(request)
     )
     if form.is_valid():
-        form.save()
-        return redirect('posts:post_detail', post.pk)
+        verdict = None
+        if 'text' in form.changed_data:
+            verdict = check_spam(request, form, post)
+        if verdict is None:
+            form.save()
+        if verdict != 'reject':
+            return redirect('posts:post_detail', post.pk)
     return render(
         request,
         template,
@@ -106,11 +248,10 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    page_obj = paging(
-        Post.objects.filter(author__following__user=request.user), request
-    )
+    page_obj = get_follow_page(request.user, request.GET)
     context = {
         'page_obj': page_obj,
+        'suggestions': get_suggestions(request.user),
     }
     return render(request, template, context)
 
@@ -121,6 +262,9 @@ def profile_follow(request, username):
     following = get_object_or_404(User, username=username)
     if follower != following:
         Follow.objects.get_or_create(user=follower, author=following)
+        FollowSuggestion.objects.filter(
+            user=follower, author=following
+        ).delete()
     return redirect('posts:profile', username)
 
 
@@ -135,3 +279,20 @@ def profile_unfollow(request, username):
     )
     follow.delete()
     return redirect('posts:profile', username)
+
+
+def serve_sitemap(path):
+    try:
+        return FileResponse(open(path, 'rb'), content_type='application/xml')
+    except FileNotFoundError:
+        raise Http404
+
+
+def sitemap_index(request):
+    return serve_sitemap(os.path.join(settings.SITEMAP_ROOT, 'sitemap.xml'))
+
+
+def sitemap_shard(request, section, number):
+    if section not in SECTIONS:
+        raise Http404
+    return serve_sitemap(get_shard_path(section, number))
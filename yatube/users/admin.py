@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import ChunkedActionsMixin
+from posts.utils import (delete_in_chunks, delete_user_content_in_chunks,
+                         get_user_content)
+
+from .models import AccountDeletion
+from .utils import schedule_account_deletion
+
+User = get_user_model()
+
+
+class ChunkedUserAdmin(ChunkedActionsMixin, UserAdmin):
+    actions = ('delete_in_chunks', 'schedule_deletion')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deletion_summary(self, queryset):
+        counts = {}
+        for content in get_user_content(queryset):
+            name = content.model._meta.verbose_name_plural
+            counts[name] = counts.get(name, 0) + content.count()
+        return (
+            (User._meta.verbose_name_plural, queryset.count()),
+            *counts.items(),
+        )
+
+    def get_deleted_objects(self, objs, request):
+        users = User.objects.filter(pk__in=[obj.pk for obj in objs])
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(User._meta.verbose_name)
+        for queryset in get_user_content(users):
+            opts = queryset.model._meta
+            # Как в админке Django: права нужны только на модели админки.
+            if not self.admin_site.is_registered(queryset.model):
+                continue
+            if not request.user.has_perm(f'{opts.app_label}.delete_'
+                                         f'{opts.model_name}'):
+                perms_needed.add(opts.verbose_name)
+        return (
+            [str(obj) for obj in objs],
+            dict(self.get_deletion_summary(users)),
+            perms_needed,
+            [],
+        )
+
+    def delete_users(self, queryset):
+        yield from delete_user_content_in_chunks(
+            queryset, settings.BULK_CHUNK_SIZE
+        )
+        yield from delete_in_chunks(queryset, settings.BULK_CHUNK_SIZE)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, User.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for _ in self.delete_users(queryset):
+            pass
+
+    def delete_in_chunks(self, request, queryset):
+        title = 'Удаление пользователей'
+        summary = self.get_deletion_summary(queryset)
+        if not request.POST.get('post'):
+            return self.bulk_action_confirmation(
+                request, 'delete_in_chunks', title, summary
+            )
+        return self.bulk_action_progress(
+            request,
+            title,
+            self.delete_users(queryset),
+            sum(count for _, count in summary)
+        )
+
+    delete_in_chunks.allowed_permissions = ('delete',)
+    delete_in_chunks.short_description = (
+        'Удалить выбранных пользователей пачками'
+    )
+
+    def schedule_deletion(self, request, queryset):
+        for user in queryset:
+            schedule_account_deletion(user)
+        self.message_user(
+            request,
+            f'Отключено и поставлено в очередь на удаление: {len(queryset)}'
+        )
+
+    schedule_deletion.allowed_permissions = ('delete',)
+    schedule_deletion.short_description = (
+        'Отключить и удалить выбранных пользователей в фоне'
+    )
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'requested',
+    )
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__username',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, ChunkedUserAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
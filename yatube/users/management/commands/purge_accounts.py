@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.models import AccountDeletion
+from users.utils import purge_account
+
+
+class Command(BaseCommand):
+    help = 'Удаляет аккаунты, поставленные в очередь на удаление'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Сколько строк удалять в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.ACCOUNT_PURGE_PAUSE,
+            help='Пауза в секундах между пачками'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Сколько аккаунтов обработать за запуск'
+        )
+
+    def handle(self, *args, **options):
+        deletions = AccountDeletion.objects.select_related('user')
+        for deletion in deletions[:options['limit']]:
+            user = deletion.user
+            removed = sum(purge_account(
+                user, options['chunk_size'], options['pause']
+            ))
+            self.stdout.write(
+                f'{user.username}: удалено строк {removed}'
+            )
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class AccountDeletion(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='deletion'
+    )
+    requested = models.DateTimeField(
+        verbose_name='Дата запроса',
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        ordering = ('requested',)
+        verbose_name = 'Удаление аккаунта'
+        verbose_name_plural = 'Удаления аккаунтов'
+
+    def __str__(self) -> str:
+        return f'Удаление {self.user}'
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (Comment, Follow, FollowSuggestion, Post,
+                          PostFingerprint, QuarantinedPost, User)
+from posts.utils import delete_user_content_in_chunks, get_user_content
+from users.models import AccountDeletion
+
+
+class TestAccountDeletion(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = User.objects.create_user(username='leaving')
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        for i in range(3):
+            post = Post.objects.create(author=self.user, text=f'Пост {i}')
+            Comment.objects.create(post=post, author=self.reader, text='К')
+        Follow.objects.create(user=self.reader, author=self.user)
+        Follow.objects.create(user=self.user, author=self.reader)
+        FollowSuggestion.objects.create(
+            user=self.user, author=self.reader, rank=1, score=1
+        )
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.user, rank=1, score=1
+        )
+        PostFingerprint.objects.create(
+            author=self.user, simhash=1, band0=1, band1=0, band2=0, band3=0,
+            created=timezone.now()
+        )
+        QuarantinedPost.objects.create(author=self.user, text='Спам', copies=3)
+
+    def test_delete_request_disables_user(self):
+        response = self.user_client.post(reverse('users:account_delete'))
+        self.assertRedirects(response, reverse('posts:index'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(
+            AccountDeletion.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+
+    def test_purge_accounts_removes_everything(self):
+        self.user_client.post(reverse('users:account_delete'))
+        call_command('purge_accounts', chunk_size=2, pause=0,
+                     stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(AccountDeletion.objects.exists())
+        self.assertFalse(FollowSuggestion.objects.exists())
+        self.assertFalse(PostFingerprint.objects.exists())
+        self.assertFalse(QuarantinedPost.objects.exists())
+        self.assertTrue(User.objects.filter(pk=self.reader.pk).exists())
+
+    def test_chunks_leave_nothing_to_cascade(self):
+        for _ in delete_user_content_in_chunks([self.user], 2):
+            pass
+        for queryset in get_user_content([self.user]):
+            with self.subTest(model=queryset.model.__name__):
+                self.assertFalse(queryset.exists())
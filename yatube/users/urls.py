@@ -11,6 +11,7 @@ urlpatterns = [
         views.SignUp.as_view(template_name='users/signup.html'),
         name='signup'
     ),
+    path('delete/', views.account_delete, name='account_delete'),
     path(
         'logout/',
         dj_views.LogoutView.as_view(template_name='users/logged_out.html'),
@@ -0,0 +1,35 @@
+import time
+
+from django.db import transaction
+
+from posts.utils import delete_user_content_in_chunks
+
+from .models import AccountDeletion
+
+
+def schedule_account_deletion(user):
+    """Отключает пользователя и ставит аккаунт в очередь на удаление.
+
+    Войти под отключённым пользователем уже нельзя, а сами данные
+    удаляет фоновая команда purge_accounts.
+    """
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=('is_active',))
+        AccountDeletion.objects.get_or_create(user=user)
+
+
+def purge_account(user, chunk_size, pause=0):
+    """Удаляет подписки, комментарии, посты и картинки пользователя.
+
+    Данные удаляются пачками с паузой между ними, чтобы не держать
+    базу в одной длинной транзакции записи; сама запись пользователя
+    удаляется последней. После каждой пачки отдаёт число удалённых строк.
+    """
+    for processed in delete_user_content_in_chunks(
+        [user], chunk_size, delete_images=True
+    ):
+        yield processed
+        time.sleep(pause)
+    user.delete()
+    yield 1
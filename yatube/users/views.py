@@ -1,10 +1,23 @@
+from django.contrib.auth import logout
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
 from .forms import CreationForm
+from .utils import schedule_account_deletion
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+@login_required
+def account_delete(request):
+    if request.method == 'POST':
+        schedule_account_deletion(request.user)
+        logout(request)
+        return redirect('posts:index')
+    return render(request, 'users/account_delete.html')
@@ -9,6 +9,66 @@ DEBUG = False
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 POSTS_ON_PAGE = 10
+# join - один запрос с JOIN по подпискам, merge - слияние лент авторов,
+# hybrid - раскладка постов по лентам при записи, кроме популярных авторов.
+FOLLOW_FEED_STRATEGY = os.getenv('FOLLOW_FEED_STRATEGY', 'join')
+FOLLOW_FEED_MERGE_BATCH = POSTS_ON_PAGE + 1
+FEED_PUSH_MAX_FOLLOWERS = 1000
+FEED_BACKFILL_POSTS = POSTS_ON_PAGE * 5
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+FOLLOW_SUGGESTIONS_COUNT = 10
+FOLLOW_SUGGESTIONS_ON_PAGE = 5
+FOLLOW_SUGGESTIONS_MAX_FANOUT = 1000
+# Похожие посты: MinHash-подпись из MINHASH_PERMUTATIONS значений режется
+# на MINHASH_BANDS полос, посты с общей полосой - кандидаты в похожие.
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_SHINGLE_SIZE = 5
+SIMILAR_POSTS_COUNT = 5
+# Волны спама: SimHash нового поста сравнивается с отпечатками постов за
+# SPAM_WINDOW секунд. Отпечатки, отличающиеся не больше чем в
+# SPAM_MAX_DISTANCE битах, считаются копиями. Начиная с SPAM_MAX_COPIES
+# копий пост отклоняется (reject) или уходит в карантин (quarantine).
+# Тексты короче SPAM_MIN_WORDS слов не проверяются.
+SPAM_ACTION = os.getenv('SPAM_ACTION', 'quarantine')
+SPAM_WINDOW = 60 * 60
+SPAM_MAX_DISTANCE = 3
+SPAM_MAX_COPIES = 3
+SPAM_SHINGLE_SIZE = 4
+SPAM_MIN_WORDS = 5
+GROUPS_ON_PAGE = 50
+GROUP_INDEX_CACHE_TIMEOUT = 300
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+BULK_CHUNK_SIZE = 500
+# Карта сайта: не больше 50 000 адресов в файле по протоколу sitemaps.org.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_BASE_URL = os.getenv('SITEMAP_BASE_URL', 'http://localhost:8000')
+ACCOUNT_PURGE_PAUSE = 0.1
+# Профилирование запросов: персонал включает его параметром ?profile=1
+# или заголовком X-Profile, остальные запросы попадают в выборку с долей
+# PROFILING_SAMPLE_RATE.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_ROOT = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_DUMPS = 200
+PROFILING_MAX_AGE_DAYS = 7
+# Порог журнала медленных запросов в миллисекундах, отрицательное
+# значение отключает журнал. По умолчанию журнал выключен.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', -1))
+SERVER_TIMING = os.getenv('SERVER_TIMING', '') == '1'
+SERVER_TIMING_NAMESPACES = ('posts', 'users', 'about')
+# Допустимое время холодного старта в секундах, проверяется тестами.
+STARTUP_TIME_BUDGET = float(os.getenv('STARTUP_TIME_BUDGET', 3))
+# Прогрев горячих страниц при запуске WSGI-приложения, пока он идёт,
+# /ready/ отвечает 503. Включается на боевых серверах WARMUP_ON_START=1,
+# чтобы команды и тесты, импортирующие yatube.wsgi, его не запускали.
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', '') == '1'
+WARMUP_PAGES = ('posts:index', 'posts:group_index')
+WARMUP_POPULAR_GROUPS = 5
+WARMUP_POPULAR_PROFILES = 5
+WARMUP_WORKERS = 4
+WARMUP_TIME_BUDGET = 30
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -29,7 +89,7 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,19 +100,22 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.timing.ServerTimingMiddleware',
+    'core.slowlog.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -125,8 +188,39 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'static')
+# Загрузки: каждый файл сразу пишется во временный файл на диске, файлы
+# больше FILE_UPLOAD_MAX_SIZE отбрасываются, не дочитываясь в память.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Картинки больше IMAGE_MAX_PIXELS отклоняются по заголовку, полностью их
+# раскодируют IMAGE_WORKERS фоновых потоков, при 0 - сразу в запросе.
+IMAGE_MAX_PIXELS = 25 * 10 ** 6
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+# Сторона размытой заглушки картинки в пикселях.
+IMAGE_PLACEHOLDER_SIZE = 16
+# Поколения кэша (ленты, список групп, ETag) меняются при записи в кэше
+# процесса, записавшего пост. С LocMemCache другие процессы увидят
+# изменения только по истечении своих записей, поэтому при нескольких
+# процессах нужен общий кэш, например Memcached.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.timing.TimedLocMemCache',
     }
 }
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+# Сведения о миниатюрах - в файле SQLite на диске узла с LRU в процессе.
+THUMBNAIL_KVSTORE = 'core.kvstore.SQLiteKVStore'
+THUMBNAIL_KVSTORE_PATH = os.getenv(
+    'THUMBNAIL_KVSTORE_PATH', os.path.join(BASE_DIR, 'thumbnails.sqlite3')
+)
+# Тесты manage.py test пишут сведения о миниатюрах во временный каталог.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+THUMBNAIL_KVSTORE_LRU_SIZE = 10000
+# Секунды, через которые запись LRU перечитывается из файла.
+THUMBNAIL_KVSTORE_LRU_TIMEOUT = 60
+THUMBNAIL_KVSTORE_TIMEOUT = 5
+# Миниатюра картинки поста в ленте и на странице поста.
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
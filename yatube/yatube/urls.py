@@ -3,8 +3,15 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import readiness
+
+# Модули admin.py загружаются вместе с URL, а не при django.setup(), чтобы
+# команды manage.py их не импортировали.
+admin.autodiscover()
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('ready/', readiness, name='readiness'),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),